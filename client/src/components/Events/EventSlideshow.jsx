@@ -7,7 +7,7 @@ import {
   ChevronRight,
   Sparkles
 } from 'lucide-react';
-import { eventsAPI } from '../../utils/api';
+import { eventsAPI, assetUrl } from '../../utils/api';
 
 const EventSlideshow = () => {
   const [featuredEvents, setFeaturedEvents] = useState([]);
@@ -128,7 +128,7 @@ const EventSlideshow = () => {
           >
             <div className="absolute inset-0 bg-gradient-to-r from-dark-900/80 to-dark-900/50 z-10"></div>
             <img
-              src={event.poster_url}
+              src={assetUrl(event.poster_url)}
               alt={event.title}
               className="w-full h-full object-cover"
             />
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Shield, AlertCircle, Calendar, Users, BarChart3, CheckCircle, Clock, X } from 'lucide-react';
 import { useAuth } from '../contexts/AuthContext';
-import { eventsAPI, adminAPI } from '../utils/api';
+import { eventsAPI, adminAPI, assetUrl } from '../utils/api';
 
 const Admin = () => {
   const { user, isAdmin } = useAuth();
@@ -17,7 +17,7 @@ const Admin = () => {
 
   const fetchPendingEvents = async () => {
     try {
-      const response = await eventsAPI.getAll({ status: 'pending' });
+      const response = await eventsAPI.getAllPages({ status: 'pending' });
       setPendingEvents(response.data);
     } catch (error) {
       console.error('Error fetching pending events:', error);
@@ -164,7 +164,7 @@ const Admin = () => {
                   <div className="flex flex-col md:flex-row gap-4">
                     <div className="md:w-1/4">
                       <img
-                        src={event.poster_url || 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=400&auto=format&fit=crop'}
+                        src={assetUrl(event.poster_url) || 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=400&auto=format&fit=crop'}
                         alt={event.title}
                         className="w-full h-32 object-cover rounded-lg"
                       />
@@ -12,7 +12,7 @@ import {
   Heart
 } from 'lucide-react';
 import { useAuth } from '../contexts/AuthContext';
-import { eventsAPI } from '../utils/api';
+import { eventsAPI, assetUrl } from '../utils/api';
 
 const EventDetails = () => {
   const { id } = useParams();
@@ -124,7 +124,7 @@ const EventDetails = () => {
 
         <div className="relative rounded-2xl overflow-hidden mb-8">
           <img
-            src={event.poster_url}
+            src={assetUrl(event.poster_url)}
             alt={event.title}
             className="w-full h-96 object-cover"
           />
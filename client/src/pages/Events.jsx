@@ -13,7 +13,7 @@ import {
   Grid,
   List
 } from 'lucide-react';
-import { eventsAPI } from '../utils/api';
+import { eventsAPI, assetUrl } from '../utils/api';
 
 const Events = () => {
   const [searchParams, setSearchParams] = useSearchParams();
@@ -28,7 +28,9 @@ const Events = () => {
   });
   const [showFilters, setShowFilters] = useState(false);
   const [page, setPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
+  // cursors[n] fetches page n + 1; the API hands back the next one in X-Next-Cursor
+  const [cursors, setCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
 
   const categories = [
     'All', 'Music', 'Conference', 'Workshop', 'Sports', 
@@ -48,9 +50,11 @@ const Events = () => {
     setLoading(true);
     try {
       const params = {
-        page,
         limit: 12
       };
+      if (cursors[page - 1]) {
+        params.cursor = cursors[page - 1];
+      }
       
       // Only add status filter if it's not 'all'
       if (filters.status && filters.status !== 'all') {
@@ -69,8 +73,7 @@ const Events = () => {
 
       const response = await eventsAPI.getAll(params);
       setEvents(response.data);
-      
-      setTotalPages(Math.ceil(response.data.length / 12));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching events:', error);
     } finally {
@@ -78,10 +81,20 @@ const Events = () => {
     }
   };
 
+  const resetPages = () => {
+    setPage(1);
+    setCursors([null]);
+  };
+
+  const goToNextPage = () => {
+    setCursors(c => [...c.slice(0, page), nextCursor]);
+    setPage(p => p + 1);
+  };
+
   const handleFilterChange = (key, value) => {
     const newFilters = { ...filters, [key]: value };
     setFilters(newFilters);
-    setPage(1);
+    resetPages();
     
     const params = new URLSearchParams(searchParams);
     if (value && value !== 'All' && value !== 'All Cities') {
@@ -100,7 +113,7 @@ const Events = () => {
       status: 'all'  // Reset to show all events
     });
     setSearchParams({});
-    setPage(1);
+    resetPages();
   };
 
   const handleSearch = (e) => {
@@ -132,7 +145,10 @@ const Events = () => {
                   type="text"
                   placeholder="Search events by name, venue, or description..."
                   value={filters.search}
-                  onChange={(e) => setFilters({...filters, search: e.target.value})}
+                  onChange={(e) => {
+                    setFilters({...filters, search: e.target.value});
+                    resetPages();
+                  }}
                   className="w-full pl-10 pr-4 py-3 bg-white dark:bg-dark-800 border border-dark-200 dark:border-dark-700 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-transparent"
                 />
                 <button
@@ -295,7 +311,7 @@ const Events = () => {
                 Showing {events.length} event{events.length !== 1 ? 's' : ''}
               </p>
               <div className="text-sm text-dark-500 dark:text-dark-400">
-                Page {page} of {totalPages}
+                Page {page}
               </div>
             </div>
 
@@ -314,7 +330,7 @@ const Events = () => {
             )}
 
             {/* Pagination */}
-            {totalPages > 1 && (
+            {(page > 1 || nextCursor) && (
               <div className="mt-8 flex justify-center">
                 <div className="flex items-center space-x-2">
                   <button
@@ -325,28 +341,13 @@ const Events = () => {
                     <ChevronDown className="h-4 w-4 transform rotate-90" />
                   </button>
                   
-                  {Array.from({ length: Math.min(5, totalPages) }, (_, i) => {
-                    const pageNum = page <= 3 ? i + 1 : 
-                                  page >= totalPages - 2 ? totalPages - 4 + i : 
-                                  page - 2 + i;
-                    return (
-                      <button
-                        key={pageNum}
-                        onClick={() => setPage(pageNum)}
-                        className={`w-10 h-10 rounded-lg ${
-                          page === pageNum
-                            ? 'bg-primary-600 text-white'
-                            : 'bg-dark-100 dark:bg-dark-800 text-dark-700 dark:text-dark-300 hover:bg-dark-200 dark:hover:bg-dark-700'
-                        }`}
-                      >
-                        {pageNum}
-                      </button>
-                    );
-                  })}
+                  <span className="w-10 h-10 rounded-lg bg-primary-600 text-white flex items-center justify-center">
+                    {page}
+                  </span>
                   
                   <button
-                    onClick={() => setPage(p => Math.min(totalPages, p + 1))}
-                    disabled={page === totalPages}
+                    onClick={goToNextPage}
+                    disabled={!nextCursor}
                     className="p-2 rounded-lg bg-dark-100 dark:bg-dark-800 disabled:opacity-50 disabled:cursor-not-allowed"
                   >
                     <ChevronDown className="h-4 w-4 transform -rotate-90" />
@@ -369,7 +370,7 @@ const EventCard = ({ event }) => (
   >
     <div className="relative overflow-hidden rounded-lg mb-4">
       <img
-        src={event.poster_url || 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=800&auto=format&fit=crop'}
+        src={assetUrl(event.poster_url) || 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=800&auto=format&fit=crop'}
         alt={event.title}
         className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-300"
       />
@@ -452,7 +453,7 @@ const EventListItem = ({ event }) => (
       <div className="md:w-1/4">
         <div className="relative overflow-hidden rounded-lg">
           <img
-            src={event.poster_url || 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=800&auto=format&fit=crop'}
+            src={assetUrl(event.poster_url) || 'https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=800&auto=format&fit=crop'}
             alt={event.title}
             className="w-full h-48 md:h-32 object-cover group-hover:scale-105 transition-transform duration-300"
           />
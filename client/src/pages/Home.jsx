@@ -7,7 +7,7 @@ import {
   ChevronRight,
   Sparkles
 } from 'lucide-react';
-import { eventsAPI } from '../utils/api';
+import { eventsAPI, assetUrl } from '../utils/api';
 
 const Home = () => {
   const [featuredEvents, setFeaturedEvents] = useState([]);
@@ -146,7 +146,7 @@ const Home = () => {
                 >
                   <div className="absolute inset-0 bg-gradient-to-r from-dark-900/80 to-dark-900/50 z-10"></div>
                   <img
-                    src={event.poster_url}
+                    src={assetUrl(event.poster_url)}
                     alt={event.title}
                     className="w-full h-full object-cover"
                   />
@@ -276,7 +276,7 @@ const Home = () => {
                 >
                   <div className="relative overflow-hidden rounded-lg mb-4">
                     <img
-                      src={event.poster_url}
+                      src={assetUrl(event.poster_url)}
                       alt={event.title}
                       className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-300"
                     />
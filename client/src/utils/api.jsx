@@ -36,6 +36,21 @@ api.interceptors.response.use(
   }
 );
 
+// Generated posters come back as API-relative paths; resolve them against the API origin
+export const assetUrl = (path) => (path && path.startsWith('/') ? `${API_URL}${path}` : path);
+
+// Follow X-Next-Cursor through every page of a list endpoint
+const fetchAllPages = async (url, params = {}) => {
+  const items = [];
+  let cursor;
+  do {
+    const response = await api.get(url, { params: { ...params, cursor } });
+    items.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return { data: items };
+};
+
 // Auth API
 export const authAPI = {
   login: (credentials) => api.post('/api/auth/login', credentials),
@@ -47,6 +62,7 @@ export const authAPI = {
 // Events API
 export const eventsAPI = {
   getAll: (params) => api.get('/api/events', { params }),
+  getAllPages: (params) => fetchAllPages('/api/events', { limit: 100, ...params }),
   getById: (id) => api.get(`/api/events/${id}`),
   create: (data) => api.post('/api/events', data),
   update: (id, data) => api.put(`/api/events/${id}`, data),
@@ -61,7 +77,7 @@ export const eventsAPI = {
 
 // Orders API
 export const ordersAPI = {
-  getAll: () => api.get('/api/orders'),
+  getAll: () => fetchAllPages('/api/orders', { limit: 100 }),
   getById: (id) => api.get(`/api/orders/${id}`),
   create: (data) => api.post('/api/orders', data),
   cancel: (id) => api.post(`/api/orders/${id}/cancel`),
@@ -101,7 +117,7 @@ export const usersAPI = {
   markNotificationRead: (userId, notificationId) => 
     api.put(`/api/users/${userId}/notifications/${notificationId}/read`),
   getUserEvents: (id) => api.get(`/api/users/${id}/events`),
-  getUserOrders: (id) => api.get(`/api/users/${id}/orders`),
+  getUserOrders: (id) => fetchAllPages(`/api/users/${id}/orders`, { limit: 100 }),
 };
 
 // Admin API
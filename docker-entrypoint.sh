@@ -3,6 +3,12 @@ echo "Starting application setup..."
 
 export FLASK_APP=run.py  
 
+# Background services (see render.yaml) pass their command - only the web service migrates and serves
+if [ "$#" -gt 0 ]; then
+    echo "Starting $*..."
+    exec "$@"
+fi
+
 echo "Running database migrations..."
 flask db upgrade
 
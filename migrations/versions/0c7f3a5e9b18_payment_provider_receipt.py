@@ -0,0 +1,76 @@
+"""payment provider receipt
+
+Revision ID: 0c7f3a5e9b18
+Revises: 6e1d4b8a2f57
+Create Date: 2026-10-18 19:34:08.215573
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c7f3a5e9b18'
+down_revision = '6e1d4b8a2f57'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+payments = sa.table('payments',
+    sa.column('provider', sa.String),
+    sa.column('provider_ref', sa.String),
+    sa.column('provider_receipt', sa.String),
+)
+
+payment_callbacks = sa.table('payment_callbacks',
+    sa.column('id', sa.Integer),
+    sa.column('provider', sa.String),
+    sa.column('payload', sa.JSON),
+    sa.column('status', sa.String),
+)
+
+
+def _mpesa_receipt(payload):
+    # Body.stkCallback.{CheckoutRequestID, CallbackMetadata.Item[MpesaReceiptNumber]}
+    callback = ((payload or {}).get('Body') or {}).get('stkCallback') or {}
+    items = (callback.get('CallbackMetadata') or {}).get('Item') or []
+    receipt = next((item.get('Value') for item in items if item.get('Name') == 'MpesaReceiptNumber'), None)
+    if callback.get('CheckoutRequestID') and receipt:
+        return callback['CheckoutRequestID'], str(receipt)
+    return None
+
+
+def upgrade():
+    op.add_column('payments', sa.Column('provider_receipt', sa.String(length=100), nullable=True))
+
+    # Recover receipt numbers from the M-Pesa callbacks already applied, in id batches
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(payment_callbacks.c.id, payment_callbacks.c.payload)
+            .where(payment_callbacks.c.provider == 'mpesa',
+                   payment_callbacks.c.status.in_(('processed', 'failed')),
+                   payment_callbacks.c.id > last_id)
+            .order_by(payment_callbacks.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        receipts = [found for found in (_mpesa_receipt(row.payload) for row in rows) if found]
+        if receipts:
+            conn.execute(
+                payments.update()
+                .where(payments.c.provider == 'mpesa',
+                       payments.c.provider_ref == sa.bindparam('ref'),
+                       payments.c.provider_receipt.is_(None))
+                .values(provider_receipt=sa.bindparam('receipt')),
+                [{'ref': ref, 'receipt': receipt} for ref, receipt in receipts]
+            )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('payments') as batch_op:
+        batch_op.drop_column('provider_receipt')
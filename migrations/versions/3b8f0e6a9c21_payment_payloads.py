@@ -0,0 +1,98 @@
+"""payment payloads
+
+Revision ID: 3b8f0e6a9c21
+Revises: 7a2e9c5f0d36
+Create Date: 2026-10-18 18:36:12.407519
+
+"""
+import json
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8f0e6a9c21'
+down_revision = '7a2e9c5f0d36'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+payments = sa.table('payments',
+    sa.column('id', sa.Integer),
+    sa.column('raw_payload', sa.JSON),
+    sa.column('created_at', sa.DateTime),
+)
+
+payment_payloads = sa.table('payment_payloads',
+    sa.column('id', sa.Integer),
+    sa.column('payment_id', sa.Integer),
+    sa.column('source', sa.String),
+    sa.column('data', sa.LargeBinary),
+    sa.column('created_at', sa.DateTime),
+)
+
+
+def upgrade():
+    op.create_table('payment_payloads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('payment_id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_payment_payloads_payment_id'), 'payment_payloads', ['payment_id'], unique=False)
+
+    # Copy existing payloads over in id batches, compressed the same way
+    # server/utils/payment_payloads.py does
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(payments.c.id, payments.c.raw_payload, payments.c.created_at)
+            .where(payments.c.raw_payload.isnot(None), payments.c.id > last_id)
+            .order_by(payments.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(payment_payloads.insert(), [{
+            'payment_id': row.id,
+            'source': 'request',
+            'data': zlib.compress(json.dumps(row.raw_payload, separators=(',', ':'), default=str).encode()),
+            'created_at': row.created_at,
+        } for row in rows])
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('payments') as batch_op:
+        batch_op.drop_column('raw_payload')
+
+
+def downgrade():
+    with op.batch_alter_table('payments') as batch_op:
+        batch_op.add_column(sa.Column('raw_payload', sa.JSON(), nullable=True))
+
+    # Put each payment's first request payload back on its row
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(payment_payloads.c.id, payment_payloads.c.payment_id, payment_payloads.c.data)
+            .where(payment_payloads.c.source == 'request', payment_payloads.c.id > last_id)
+            .order_by(payment_payloads.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            payments.update()
+            .where(payments.c.id == sa.bindparam('p_id'), payments.c.raw_payload.is_(None)),
+            [{'p_id': row.payment_id, 'raw_payload': json.loads(zlib.decompress(row.data))} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    op.drop_index(op.f('ix_payment_payloads_payment_id'), table_name='payment_payloads')
+    op.drop_table('payment_payloads')
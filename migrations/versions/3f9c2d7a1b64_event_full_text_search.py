@@ -0,0 +1,76 @@
+"""event full-text search
+
+Revision ID: 3f9c2d7a1b64
+Revises: 61a853a2dcc9
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2d7a1b64'
+down_revision = '61a853a2dcc9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Weighted so title (A) outranks category/venue (B) and description (C)
+        op.execute("""
+            ALTER TABLE events ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(venue, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            ) STORED
+        """)
+        op.create_index('ix_events_search_vector', 'events', ['search_vector'], postgresql_using='gin')
+
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE events_fts USING fts5(
+                title, category, venue, description,
+                content='events', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER events_fts_ai AFTER INSERT ON events BEGIN
+                INSERT INTO events_fts(rowid, title, category, venue, description)
+                VALUES (new.id, new.title, new.category, new.venue, new.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER events_fts_ad AFTER DELETE ON events BEGIN
+                INSERT INTO events_fts(events_fts, rowid, title, category, venue, description)
+                VALUES ('delete', old.id, old.title, old.category, old.venue, old.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER events_fts_au AFTER UPDATE OF title, category, venue, description ON events BEGIN
+                INSERT INTO events_fts(events_fts, rowid, title, category, venue, description)
+                VALUES ('delete', old.id, old.title, old.category, old.venue, old.description);
+                INSERT INTO events_fts(rowid, title, category, venue, description)
+                VALUES (new.id, new.title, new.category, new.venue, new.description);
+            END
+        """)
+        op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.drop_index('ix_events_search_vector', table_name='events')
+        op.drop_column('events', 'search_vector')
+
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS events_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS events_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS events_fts_ai')
+        op.execute('DROP TABLE IF EXISTS events_fts')
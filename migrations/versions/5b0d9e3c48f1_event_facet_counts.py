@@ -0,0 +1,43 @@
+"""event facet counts
+
+Revision ID: 5b0d9e3c48f1
+Revises: c2e8b5f17a90
+Create Date: 2026-10-18 12:03:19.270561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b0d9e3c48f1'
+down_revision = 'c2e8b5f17a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('event_facet_counts',
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=100), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'value')
+    )
+
+    # Seed from the approved events (same as `flask rebuild-facets`)
+    if op.get_bind().dialect.name == 'postgresql':
+        month = "to_char(start_time, 'YYYY-MM')"
+    else:
+        month = "strftime('%Y-%m', start_time)"
+
+    for dimension, expression in (('category', 'category'), ('city', 'city'), ('month', month)):
+        op.execute(f"""
+            INSERT INTO event_facet_counts (dimension, value, count)
+            SELECT '{dimension}', {expression}, count(*) FROM events
+            WHERE status = 'approved' AND {expression} IS NOT NULL
+            GROUP BY {expression}
+        """)
+
+
+def downgrade():
+    op.drop_table('event_facet_counts')
@@ -0,0 +1,25 @@
+"""payment callback retries
+
+Revision ID: 6e1d4b8a2f57
+Revises: 3b8f0e6a9c21
+Create Date: 2026-10-18 19:10:42.631850
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e1d4b8a2f57'
+down_revision = '3b8f0e6a9c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('payment_callbacks', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('payment_callbacks') as batch_op:
+        batch_op.drop_column('next_attempt_at')
@@ -0,0 +1,38 @@
+"""payment callbacks
+
+Revision ID: 7a2e9c5f0d36
+Revises: d4c81f6e2a95
+Create Date: 2026-10-18 17:58:30.214477
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2e9c5f0d36'
+down_revision = 'd4c81f6e2a95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payment_callbacks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_payment_callbacks_pending', 'payment_callbacks', ['id'],
+                    postgresql_where=sa.text("status = 'pending'"),
+                    sqlite_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    op.drop_index('ix_payment_callbacks_pending', table_name='payment_callbacks')
+    op.drop_table('payment_callbacks')
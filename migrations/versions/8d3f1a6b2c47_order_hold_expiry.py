@@ -0,0 +1,35 @@
+"""order hold expiry
+
+Revision ID: 8d3f1a6b2c47
+Revises: e4a1c6d8f352
+Create Date: 2026-10-18 14:12:40.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f1a6b2c47'
+down_revision = 'e4a1c6d8f352'
+branch_labels = None
+depends_on = None
+
+LIVE_HOLD = "payment_status = 'pending' AND order_status = 'processing'"
+
+
+def upgrade():
+    op.add_column('orders', sa.Column('hold_expires_at', sa.DateTime(), nullable=True))
+
+    # Existing unpaid orders predate holds and keep their tickets (NULL never expires)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_pending_hold_expires_at', 'orders', ['hold_expires_at'],
+                        postgresql_concurrently=True,
+                        postgresql_where=sa.text(LIVE_HOLD),
+                        sqlite_where=sa.text(LIVE_HOLD))
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_pending_hold_expires_at', table_name='orders', postgresql_concurrently=True)
+    op.drop_column('orders', 'hold_expires_at')
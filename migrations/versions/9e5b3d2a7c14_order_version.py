@@ -0,0 +1,37 @@
+"""order version
+
+Revision ID: 9e5b3d2a7c14
+Revises: 2c9a7e4f1b60
+Create Date: 2026-10-18 16:47:13.602981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e5b3d2a7c14'
+down_revision = '2c9a7e4f1b60'
+branch_labels = None
+depends_on = None
+
+
+def _recreate_hold_index(where):
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_pending_hold_expires_at', table_name='orders', postgresql_concurrently=True)
+        op.create_index('ix_orders_pending_hold_expires_at', 'orders', ['hold_expires_at'],
+                        postgresql_concurrently=True,
+                        postgresql_where=sa.text(where),
+                        sqlite_where=sa.text(where))
+
+
+def upgrade():
+    op.add_column('orders', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+    # Holds of orders whose payment failed expire too now
+    _recreate_hold_index("order_status = 'processing'")
+
+
+def downgrade():
+    _recreate_hold_index("payment_status = 'pending' AND order_status = 'processing'")
+    op.drop_column('orders', 'version')
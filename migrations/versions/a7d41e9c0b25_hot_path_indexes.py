@@ -0,0 +1,60 @@
+"""hot path indexes
+
+Revision ID: a7d41e9c0b25
+Revises: 3f9c2d7a1b64
+Create Date: 2026-10-18 10:41:07.552931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d41e9c0b25'
+down_revision = '3f9c2d7a1b64'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_users_role_id', 'users', ['role_id'], None),
+    ('ix_events_organizer_id', 'events', ['organizer_id'], None),
+    ('ix_events_status_start_time', 'events', ['status', 'start_time', 'id'], None),
+    ('ix_events_status_category_start_time', 'events', ['status', 'category', 'start_time'], None),
+    ('ix_events_status_city_start_time', 'events', ['status', 'city', 'start_time'], None),
+    ('ix_events_approved_start_time', 'events', ['start_time', 'id'], "status = 'approved'"),
+    ('ix_event_approvals_event_id', 'event_approvals', ['event_id'], None),
+    ('ix_event_approvals_admin_id', 'event_approvals', ['admin_id'], None),
+    ('ix_event_registrations_event_id', 'event_registrations', ['event_id'], None),
+    ('ix_ticket_types_event_id', 'ticket_types', ['event_id'], None),
+    ('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], None),
+    ('ix_orders_event_id', 'orders', ['event_id'], None),
+    ('ix_orders_created_at', 'orders', ['created_at'], None),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], None),
+    ('ix_order_items_ticket_type_id', 'order_items', ['ticket_type_id'], None),
+    ('ix_payments_order_id', 'payments', ['order_id'], None),
+    ('ix_payments_provider_ref', 'payments', ['provider_ref'], None),
+    ('ix_tickets_order_id', 'tickets', ['order_id'], None),
+    ('ix_tickets_ticket_type_id', 'tickets', ['ticket_type_id'], None),
+    ('ix_reviews_event_id_created_at', 'reviews', ['event_id', 'created_at'], None),
+    ('ix_wishlists_event_id', 'wishlists', ['event_id'], None),
+    ('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at'], None),
+]
+
+
+def upgrade():
+    # Built concurrently on Postgres so the live tables stay writable
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            predicate = sa.text(where) if where else None
+            op.create_index(name, table, columns,
+                            postgresql_concurrently=True,
+                            postgresql_where=predicate,
+                            sqlite_where=predicate)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,24 @@
+"""event high demand flag
+
+Revision ID: b61e0f4d9a23
+Revises: 8d3f1a6b2c47
+Create Date: 2026-10-18 14:58:06.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61e0f4d9a23'
+down_revision = '8d3f1a6b2c47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('high_demand', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    op.drop_column('events', 'high_demand')
@@ -0,0 +1,41 @@
+"""event rating aggregate
+
+Revision ID: c2e8b5f17a90
+Revises: a7d41e9c0b25
+Create Date: 2026-10-18 11:26:53.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e8b5f17a90'
+down_revision = 'a7d41e9c0b25'
+branch_labels = None
+depends_on = None
+
+
+RATING_COLUMNS = ['rating_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+def upgrade():
+    for column in RATING_COLUMNS:
+        op.add_column('events', sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from existing reviews (same as `flask backfill-ratings`)
+    op.execute("""
+        UPDATE events SET
+            rating_count = (SELECT count(*) FROM reviews WHERE reviews.event_id = events.id),
+            rating_sum = (SELECT coalesce(sum(rating), 0) FROM reviews WHERE reviews.event_id = events.id),
+            rating_1 = (SELECT count(*) FROM reviews WHERE reviews.event_id = events.id AND rating = 1),
+            rating_2 = (SELECT count(*) FROM reviews WHERE reviews.event_id = events.id AND rating = 2),
+            rating_3 = (SELECT count(*) FROM reviews WHERE reviews.event_id = events.id AND rating = 3),
+            rating_4 = (SELECT count(*) FROM reviews WHERE reviews.event_id = events.id AND rating = 4),
+            rating_5 = (SELECT count(*) FROM reviews WHERE reviews.event_id = events.id AND rating = 5)
+    """)
+
+
+def downgrade():
+    for column in reversed(RATING_COLUMNS):
+        op.drop_column('events', column)
@@ -0,0 +1,40 @@
+"""user ticket purchases
+
+Revision ID: d4c81f6e2a95
+Revises: 9e5b3d2a7c14
+Create Date: 2026-10-18 17:20:45.881306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4c81f6e2a95'
+down_revision = '9e5b3d2a7c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_ticket_purchases',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_types.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'ticket_type_id')
+    )
+
+    # Seed from every order that still holds its tickets
+    op.execute("""
+        INSERT INTO user_ticket_purchases (user_id, ticket_type_id, quantity)
+        SELECT orders.user_id, order_items.ticket_type_id, SUM(order_items.quantity)
+        FROM order_items JOIN orders ON orders.id = order_items.order_id
+        WHERE orders.order_status <> 'cancelled'
+        GROUP BY orders.user_id, order_items.ticket_type_id
+    """)
+
+
+def downgrade():
+    op.drop_table('user_ticket_purchases')
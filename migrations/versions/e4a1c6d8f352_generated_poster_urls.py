@@ -0,0 +1,141 @@
+"""generated poster urls
+
+Revision ID: e4a1c6d8f352
+Revises: 5b0d9e3c48f1
+Create Date: 2026-10-18 12:47:31.680914
+
+"""
+import hashlib
+import zlib
+from xml.sax.saxutils import escape
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a1c6d8f352'
+down_revision = '5b0d9e3c48f1'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+events = sa.table('events',
+    sa.column('id', sa.Integer),
+    sa.column('title', sa.String),
+    sa.column('category', sa.String),
+    sa.column('poster_url', sa.String),
+)
+
+
+# Frozen copy of the poster generator so later changes to the app can't alter this migration
+def _poster_svg(title, category):
+    """server.utils.posters.generate_event_background as of this revision"""
+    
+    # Define color palettes for different categories
+    category_colors = {
+        'Music': [('#667eea', '#764ba2'), ('#f093fb', '#f5576c')],
+        'Conference': [('#4facfe', '#00f2fe'), ('#667eea', '#764ba2')],
+        'Workshop': [('#43e97b', '#38f9d7'), ('#fa709a', '#fee140')],
+        'Sports': [('#fa709a', '#fee140'), ('#f093fb', '#f5576c')],
+        'Networking': [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe')],
+        'Art': [('#f093fb', '#f5576c'), ('#fa709a', '#fee140')],
+        'Food': [('#fa709a', '#fee140'), ('#43e97b', '#38f9d7')],
+        'Technology': [('#4facfe', '#00f2fe'), ('#667eea', '#764ba2')],
+        'Business': [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe')],
+        'Education': [('#43e97b', '#38f9d7'), ('#4facfe', '#00f2fe')]
+    }
+    
+    # Get colors for category or use default
+    if category in category_colors:
+        colors = category_colors[category]
+    else:
+        colors = [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe'), 
+                  ('#43e97b', '#38f9d7'), ('#fa709a', '#fee140')]
+    
+    # Pick a color based on title hash (crc32 - hash() is salted per process)
+    title_hash = zlib.crc32(title.encode('utf-8')) if title else 0
+    color_index = title_hash % len(colors)
+    gradient_colors = colors[color_index]
+    
+    # Create an SVG gradient background
+    svg = f'''
+    <svg xmlns="http://www.w3.org/2000/svg" width="800" height="600" viewBox="0 0 800 600">
+        <defs>
+            <linearGradient id="grad" x1="0%" y1="0%" x2="100%" y2="100%">
+                <stop offset="0%" stop-color="{gradient_colors[0]}" />
+                <stop offset="100%" stop-color="{gradient_colors[1]}" />
+            </linearGradient>
+        </defs>
+        
+        <rect width="100%" height="100%" fill="url(#grad)"/>
+        
+        <!-- Decorative circles -->
+        <circle cx="100" cy="100" r="60" fill="white" opacity="0.1"/>
+        <circle cx="700" cy="500" r="80" fill="white" opacity="0.1"/>
+        <circle cx="600" cy="100" r="40" fill="white" opacity="0.1"/>
+        
+        <!-- Event title -->
+        <text x="400" y="300" 
+              font-family="Arial, sans-serif" 
+              font-size="48" 
+              font-weight="bold"
+              fill="white" 
+              text-anchor="middle" 
+              dominant-baseline="middle">
+            {escape(title or '')}
+        </text>
+        
+        <!-- Category badge -->
+        <rect x="350" y="350" width="100" height="30" rx="15" fill="white" opacity="0.2"/>
+        <text x="400" y="365" 
+              font-family="Arial, sans-serif" 
+              font-size="14" 
+              fill="white" 
+              text-anchor="middle" 
+              dominant-baseline="middle">
+            {escape(category or '')}
+        </text>
+    </svg>
+    '''
+    
+    return svg
+
+
+def _generated_poster_url(row):
+    svg = _poster_svg(row.title, row.category)
+    digest = hashlib.sha256(svg.encode('utf-8')).hexdigest()[:16]
+    return f"/api/events/{row.id}/poster.svg?v={digest}"
+
+
+def _rewrite(condition, new_url):
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(events.c.id, events.c.title, events.c.category)
+            .where(condition, events.c.id > last_id)
+            .order_by(events.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            events.update().where(events.c.id == sa.bindparam('event_id')),
+            [{'event_id': row.id, 'poster_url': new_url(row)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def upgrade():
+    # Inline SVG data URLs become short URLs served by /api/events/<id>/poster.svg
+    _rewrite(events.c.poster_url.like('data:image/svg+xml%'),
+             _generated_poster_url)
+
+
+def downgrade():
+    # The inline data URLs (~2 KB) don't fit poster_url's String(255) on Postgres,
+    # so generated posters are cleared instead - clients show their default image
+    _rewrite(events.c.poster_url.like('/api/events/%/poster.svg%'),
+             lambda row: None)
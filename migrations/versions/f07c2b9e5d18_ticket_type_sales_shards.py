@@ -0,0 +1,41 @@
+"""ticket type sales shards
+
+Revision ID: f07c2b9e5d18
+Revises: b61e0f4d9a23
+Create Date: 2026-10-18 15:31:52.377410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f07c2b9e5d18'
+down_revision = 'b61e0f4d9a23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ticket_types', sa.Column('sales_shards', sa.Integer(), nullable=False, server_default='0'))
+    op.create_table('ticket_type_shards',
+    sa.Column('ticket_type_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('allotted', sa.Integer(), nullable=False),
+    sa.Column('sold', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ticket_type_id'], ['ticket_types.id'], ),
+    sa.PrimaryKeyConstraint('ticket_type_id', 'shard')
+    )
+
+
+def downgrade():
+    # Fold shard sales back into the single counter before dropping them
+    op.execute("""
+        UPDATE ticket_types SET quantity_sold = COALESCE(quantity_sold, 0) + (
+            SELECT COALESCE(SUM(sold), 0) FROM ticket_type_shards
+            WHERE ticket_type_shards.ticket_type_id = ticket_types.id
+        )
+        WHERE sales_shards > 0
+    """)
+    op.drop_table('ticket_type_shards')
+    op.drop_column('ticket_types', 'sales_shards')
@@ -0,0 +1,117 @@
+"""Time `reconcile-payments` on a generated settlement statement.
+
+Seeds --lines successful M-Pesa payments, writes a statement CSV in the
+M-Pesa org statement layout (Receipt No., Completion Time, Details, Paid In)
+with a known number of missing, extra, duplicated and mis-priced lines, runs
+read_statement + reconcile over it and checks every discrepancy is reported.
+The target is a 500k-line statement in well under a minute.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set.
+
+    python scripts/bench_reconciliation.py [--lines 500000] [--errors 100]
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from server import create_app
+from server.config import config
+from server.extensions import db
+from server.models import Event, Order, Role, User
+from server.utils.reconciliation import read_statement, reconcile
+
+
+def seed(lines):
+    Role.create_default_roles()
+    user = User(username='bench', email='bench@event360.com', role_id=2)
+    user.set_password('benchmark')
+    db.session.add(user)
+    db.session.flush()
+
+    start = datetime.now(timezone.utc) + timedelta(days=7)
+    event = Event(organizer_id=user.id, title='Reconciliation benchmark', venue='KICC', start_time=start,
+                  end_time=start + timedelta(hours=3), category='Business', status='approved')
+    db.session.add(event)
+    db.session.flush()
+    order = Order(user_id=user.id, event_id=event.id, total_amount=0)
+    db.session.add(order)
+    db.session.flush()
+
+    # Payments are only read by the reconciliation, so share one order
+    payments = db.metadata.tables['payments']
+    now = datetime.now(timezone.utc)
+    for offset in range(0, lines, 10000):
+        db.session.execute(payments.insert(), [
+            {'order_id': order.id, 'provider': 'mpesa', 'provider_ref': f'ws_CO_{i:012d}',
+             'provider_receipt': f'R{i:09d}', 'amount': 500 + i % 1000, 'status': 'success', 'created_at': now}
+            for i in range(offset, min(offset + 10000, lines))
+        ])
+    db.session.commit()
+
+
+def write_statement(path, lines, errors):
+    # First `errors` payments are left off the statement, the next `errors`
+    # are settled at a different amount and the next `errors` appear twice.
+    # `errors` receipts on the statement have no payment at all.
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Receipt No.', 'Completion Time', 'Details', 'Transaction Status', 'Paid In', 'Withdrawn'])
+        for i in range(errors, lines):
+            amount = 500 + i % 1000
+            if i < errors * 2:
+                amount += 1
+            row = [f'R{i:09d}', '2026-10-01 12:00:00', 'Event360 ticket payment', 'Completed', f'{amount:,.2f}', '']
+            writer.writerow(row)
+            if errors * 2 <= i < errors * 3:
+                writer.writerow(row)
+        for i in range(errors):
+            writer.writerow([f'X{i:09d}', '2026-10-01 12:00:00', 'Unknown payer', 'Completed', '100.00', ''])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', type=int, default=500000)
+    parser.add_argument('--errors', type=int, default=100, help='Discrepancies of each kind to inject')
+    args = parser.parse_args()
+
+    config['development'].SQLALCHEMY_ECHO = False
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        started = time.monotonic()
+        seed(args.lines)
+        path = os.path.join(tempfile.mkdtemp(), 'statement.csv')
+        write_statement(path, args.lines, args.errors)
+        print(f'Seeded {args.lines} payments and wrote the statement in {time.monotonic() - started:.1f}s')
+
+        started = time.monotonic()
+        with open(path, encoding='utf-8-sig', newline='') as lines:
+            statement = read_statement(lines)
+        parsed = time.monotonic()
+        result = reconcile(statement)
+        finished = time.monotonic()
+
+        print(f"Parsed {result['statement_lines']} lines in {parsed - started:.2f}s, "
+              f"reconciled {result['payments_checked']} payments in {finished - parsed:.2f}s "
+              f"({finished - started:.2f}s total)")
+        expected = {'missing_in_db': args.errors, 'missing_in_statement': args.errors,
+                    'amount_mismatches': args.errors, 'duplicates_in_statement': args.errors}
+        failed = False
+        for category, count in expected.items():
+            found = len(result[category])
+            failed |= found != count
+            print(f"{'ok  ' if found == count else 'FAIL'}  {category}: {found} (expected {count})")
+        sys.exit(1 if failed or finished - started > 60 else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Compare issuing an order's tickets one ORM object at a time with the bulk insert.
+
+For orders of 1, 20 and 500 tickets (or --sizes), times the old per-seat
+Ticket() loop plus flush against server.utils.tickets.issue_tickets, each
+inside a transaction that is rolled back afterwards, and reports p50/p95
+latency and the number of statements sent to the database.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set.
+
+    python scripts/bench_ticket_insert.py [--sizes 1,20,500] [--runs 30]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+
+from sqlalchemy import event as sa_event
+
+from server import create_app
+from server.config import config
+from server.extensions import db
+from server.models import Event, Order, Role, Ticket, TicketType, User
+from server.utils.tickets import issue_tickets
+
+
+def seed():
+    Role.create_default_roles()
+    user = User(username='bench', email='bench@event360.com', role_id=2)
+    user.set_password('benchmark')
+    db.session.add(user)
+    db.session.flush()
+
+    start = datetime.now(timezone.utc) + timedelta(days=7)
+    event = Event(organizer_id=user.id, title='Ticket benchmark', venue='KICC', start_time=start,
+                  end_time=start + timedelta(hours=3), category='Business', status='approved')
+    db.session.add(event)
+    db.session.flush()
+
+    ticket_type = TicketType(event_id=event.id, name='Corporate', price=5000, quantity_total=100000)
+    order = Order(user_id=user.id, event_id=event.id, total_amount=0)
+    db.session.add_all([ticket_type, order])
+    db.session.commit()
+    return order.id, ticket_type.id
+
+
+def orm_loop(order_id, ticket_type_id, quantity):
+    # The loop create_order used before the bulk path
+    for _ in range(quantity):
+        db.session.add(Ticket(
+            order_id=order_id,
+            ticket_type_id=ticket_type_id,
+            code=f"TKT-{uuid.uuid4().hex[:12].upper()}",
+            status='valid'
+        ))
+    db.session.flush()
+
+
+def bulk_insert(order_id, ticket_type_id, quantity):
+    issue_tickets(order_id, [(ticket_type_id, quantity)])
+
+
+def measure(fn, quantity, runs, order_id, ticket_type_id):
+    statements = []
+    counter = lambda *args: statements.append(1)
+    timings = []
+    for run in range(runs):
+        db.session.rollback()
+        if run == 0:
+            sa_event.listen(db.engine, 'before_cursor_execute', counter)
+        started = time.perf_counter()
+        fn(order_id, ticket_type_id, quantity)
+        timings.append((time.perf_counter() - started) * 1000)
+        if run == 0:
+            sa_event.remove(db.engine, 'before_cursor_execute', counter)
+    db.session.rollback()
+
+    timings.sort()
+    return {
+        'p50_ms': statistics.median(timings),
+        'p95_ms': timings[max(0, int(len(timings) * 0.95) - 1)],
+        'statements': len(statements),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1,20,500')
+    parser.add_argument('--runs', type=int, default=30)
+    args = parser.parse_args()
+
+    config['development'].SQLALCHEMY_ECHO = False
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        order_id, ticket_type_id = seed()
+
+        print(f'{args.runs} runs each')
+        for quantity in (int(size) for size in args.sizes.split(',')):
+            for name, fn in (('orm loop', orm_loop), ('bulk insert', bulk_insert)):
+                result = measure(fn, quantity, args.runs, order_id, ticket_type_id)
+                print(f"{quantity:5} tickets  {name:12} p50 {result['p50_ms']:8.2f} ms   "
+                      f"p95 {result['p95_ms']:8.2f} ms   {result['statements']:4} statements")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Drive the whole checkout flow against the local M-Pesa simulator and report per-stage latency.
+
+Each of --users virtual buyers registers, places a one-ticket order, starts
+an M-Pesa payment (answered by server/utils/mpesa_simulator.py) and waits
+for the simulated callback to be applied by the callback workers, all
+through the real routes. Reports throughput and p50/p95/p99/max latency
+for every stage, the payment outcomes, and checks that every order ended
+up in the state its callback said it should.
+
+The callback stage is measured from the payment response until the
+payment leaves 'pending', so it includes the simulated customer delay
+(--min-latency/--max-latency) as well as the inbox and worker time.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set; point it
+at a scratch Postgres database for numbers that mean something.
+
+    python scripts/checkout_load.py [--users 200] [--workers 16] [--callback-workers 2]
+        [--min-latency 0.2] [--max-latency 1] [--failure-rate 0.1] [--duplicate-rate 0.05]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'checkout.db')}"
+
+from server import create_app
+from server.config import config
+from server.extensions import db, mpesa_simulator
+from server.models import Event, Order, Payment, PaymentCallback, Role, TicketType, User
+from server.utils.payment_callbacks import process_callbacks
+
+STAGES = ('register', 'order', 'pay', 'callback')
+
+
+def seed(users):
+    Role.create_default_roles()
+    organizer = User(username='load-organizer', email='load-organizer@event360.com', role_id=2)
+    organizer.set_password('checkout')
+    db.session.add(organizer)
+    db.session.flush()
+
+    start = datetime.now(timezone.utc) + timedelta(days=7)
+    event = Event(organizer_id=organizer.id, title='Checkout load test', venue='KICC', city='Nairobi',
+                  country='Kenya', start_time=start, end_time=start + timedelta(hours=3),
+                  category='Music', status='approved')
+    db.session.add(event)
+    db.session.flush()
+
+    ticket_type = TicketType(event_id=event.id, name='General', price=1000, quantity_total=users, quantity_sold=0)
+    db.session.add(ticket_type)
+    db.session.commit()
+    return ticket_type.id
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16, help='buyers in flight at once')
+    parser.add_argument('--callback-workers', type=int, default=2)
+    parser.add_argument('--min-latency', type=float, default=0.2, help='simulated seconds until the callback')
+    parser.add_argument('--max-latency', type=float, default=1.0)
+    parser.add_argument('--failure-rate', type=float, default=0.1)
+    parser.add_argument('--duplicate-rate', type=float, default=0.05)
+    parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for a callback')
+    args = parser.parse_args()
+
+    settings = config['development']
+    settings.SQLALCHEMY_ECHO = False
+    settings.MPESA_SIMULATOR = True
+    settings.MPESA_SIM_MIN_LATENCY = args.min_latency
+    settings.MPESA_SIM_MAX_LATENCY = args.max_latency
+    settings.MPESA_SIM_FAILURE_RATE = args.failure_rate
+    settings.MPESA_SIM_DUPLICATE_RATE = args.duplicate_rate
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        ticket_type_id = seed(args.users)
+
+    stop = threading.Event()
+
+    def callback_worker():
+        with app.app_context():
+            while not stop.is_set():
+                if not process_callbacks(app.config['CALLBACK_BATCH_SIZE']):
+                    time.sleep(0.05)
+
+    callback_threads = [threading.Thread(target=callback_worker, daemon=True) for _ in range(args.callback_workers)]
+    for thread in callback_threads:
+        thread.start()
+
+    client = app.test_client()
+    timings = defaultdict(list)
+    errors = Counter()
+
+    def timed(stage, call, expected):
+        started = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - started
+        if response.status_code != expected:
+            errors[f'{stage} {response.status_code}'] += 1
+            return None
+        timings[stage].append(elapsed)
+        return response.get_json()
+
+    def checkout(i):
+        body = timed('register', lambda: client.post('/api/auth/register', json={
+            'username': f'loaduser{i}', 'email': f'loaduser{i}@event360.com',
+            'password': 'checkout-load', 'phone': f'2547{i:08d}'}), 201)
+        if body is None:
+            return None
+        headers = {'Authorization': f"Bearer {body['token']}"}
+
+        body = timed('order', lambda: client.post('/api/orders', headers=headers, json={
+            'cart_items': [{'ticket_type_id': ticket_type_id, 'quantity': 1}]}), 201)
+        if body is None:
+            return None
+        order = body['order']
+
+        payment = timed('pay', lambda: client.post('/api/payments', headers=headers, json={
+            'order_id': order['id'], 'amount': order['total_amount'], 'provider': 'mpesa'}), 202)
+        if payment is None:
+            return None
+
+        started = time.perf_counter()
+        deadline = started + args.timeout
+        while time.perf_counter() < deadline:
+            status = client.get(f"/api/payments/{payment['payment_id']}", headers=headers).get_json()['status']
+            if status != 'pending':
+                timings['callback'].append(time.perf_counter() - started)
+                return order['id'], status
+            time.sleep(0.02)
+        errors['callback timeout'] += 1
+        return order['id'], 'pending'
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = [result for result in pool.map(checkout, range(args.users)) if result]
+    elapsed = time.perf_counter() - started
+
+    # Let straggling duplicate callbacks land before checking the end state
+    while mpesa_simulator.pending():
+        time.sleep(0.1)
+    time.sleep(0.5)
+    stop.set()
+    for thread in callback_threads:
+        thread.join()
+
+    print(f'{args.users} buyers, {args.workers} in flight, {args.callback_workers} callback workers, '
+          f'callback delay {args.min_latency}-{args.max_latency}s, '
+          f'failure rate {args.failure_rate}, duplicate rate {args.duplicate_rate}')
+    print(f'{len(results)} checkouts completed in {elapsed:.1f}s ({len(results) / elapsed:.1f}/s)')
+    for stage in STAGES:
+        values = sorted(timings[stage])
+        if not values:
+            print(f'{stage:9} no successful requests')
+            continue
+        print(f'{stage:9} {len(values):6} ok  {len(values) / elapsed:7.1f}/s   '
+              f'p50 {percentile(values, 0.50) * 1000:8.1f} ms   p95 {percentile(values, 0.95) * 1000:8.1f} ms   '
+              f'p99 {percentile(values, 0.99) * 1000:8.1f} ms   max {values[-1] * 1000:8.1f} ms')
+    if errors:
+        print('errors: ' + ', '.join(f'{name} x{count}' for name, count in sorted(errors.items())))
+
+    outcomes = Counter(status for _, status in results)
+    print('payments: ' + ', '.join(f'{status} x{count}' for status, count in sorted(outcomes.items())))
+
+    with app.app_context():
+        callbacks = dict(db.session.execute(
+            db.select(PaymentCallback.status, db.func.count()).group_by(PaymentCallback.status)).all())
+        duplicates = db.session.scalar(db.select(db.func.count()).select_from(PaymentCallback)
+                                       .where(PaymentCallback.error.like('Duplicate callback%')))
+        orders = dict(db.session.execute(
+            db.select(Order.id, Order.payment_status).where(Order.id.in_([order_id for order_id, _ in results]))).all())
+        paid = db.session.scalar(db.select(db.func.count()).select_from(Payment).where(Payment.status == 'success'))
+
+    print('callbacks: ' + ', '.join(f'{status} x{count}' for status, count in sorted(callbacks.items()))
+          + f' ({duplicates} duplicates ignored)')
+
+    expected = {'success': 'completed', 'failed': 'failed'}
+    inconsistent = [order_id for order_id, status in results if orders.get(order_id) != expected.get(status)]
+    ok = not inconsistent and paid == outcomes['success'] and not callbacks.get('pending')
+    print('OK' if ok else f'INCONSISTENT: {len(inconsistent)} orders do not match their payment')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
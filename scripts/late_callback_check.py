@@ -0,0 +1,107 @@
+"""Check that a payment confirmed after the order hold ran out still gets its tickets.
+
+Seeds an event and a buyer, runs the app with a one-second ORDER_HOLD_TTL and
+places two orders through the real routes. One is left unpaid, the other gets
+a payment started. Once the original hold has elapsed the hold sweeper runs,
+then the provider's success callback for the paid order is processed.
+
+The unpaid order must be released. The paid order must survive the sweep and
+end up confirmed, with its payment successful and its tickets still valid.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set.
+
+    python scripts/late_callback_check.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'late_callback.db')}"
+
+import jwt
+
+from server import create_app
+from server.auth import SECRET_KEY
+from server.config import config
+from server.extensions import db
+from server.models import Event, Order, Payment, Role, Ticket, TicketType, User
+from server.utils.inventory import sweep_expired_holds
+from server.utils.payment_callbacks import enqueue_callback, process_callbacks
+
+ORDER_HOLD_TTL = 1
+
+
+def seed():
+    Role.create_default_roles()
+    organizer = User(username='late-organizer', email='late-organizer@event360.com', role_id=2)
+    organizer.set_password('late-callback')
+    buyer = User(username='late-buyer', email='late-buyer@event360.com', role_id=3,
+                 password_hash=organizer.password_hash)
+    db.session.add_all([organizer, buyer])
+    db.session.flush()
+
+    start = datetime.now(timezone.utc) + timedelta(days=7)
+    event = Event(organizer_id=organizer.id, title='Late callback check', description='Payment hold check',
+                  venue='KICC', city='Nairobi', country='Kenya', start_time=start,
+                  end_time=start + timedelta(hours=3), category='Music', status='approved')
+    db.session.add(event)
+    db.session.flush()
+
+    ticket_type = TicketType(event_id=event.id, name='General', price=1000, quantity_total=10, quantity_sold=0)
+    db.session.add(ticket_type)
+    db.session.commit()
+    return ticket_type.id, buyer.id
+
+
+def main():
+    config['development'].SQLALCHEMY_ECHO = False
+    app = create_app('development')
+    app.config['ORDER_HOLD_TTL'] = ORDER_HOLD_TTL
+    with app.app_context():
+        db.create_all()
+        ticket_type_id, buyer_id = seed()
+
+    client = app.test_client()
+    token = jwt.encode({'user_id': buyer_id, 'exp': datetime.now(timezone.utc) + timedelta(hours=1)}, SECRET_KEY)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def place_order():
+        response = client.post('/api/orders', json={'cart_items': [{'ticket_type_id': ticket_type_id, 'quantity': 1}]},
+                               headers=headers)
+        return response.get_json()['order']['id']
+
+    unpaid_id, paid_id = place_order(), place_order()
+    response = client.post('/api/payments', json={'order_id': paid_id, 'amount': 1000, 'provider': 'generic',
+                                                  'provider_ref': 'LATE-1'}, headers=headers)
+    print(f'payment started: {response.status_code}')
+
+    time.sleep(ORDER_HOLD_TTL + 1)
+    with app.app_context():
+        released = sweep_expired_holds(100)
+        enqueue_callback('generic', {'provider_ref': 'LATE-1', 'status': 'success', 'amount': 1000})
+        process_callbacks(10)
+
+        unpaid = db.session.get(Order, unpaid_id)
+        paid = db.session.get(Order, paid_id)
+        payment = db.session.scalars(db.select(Payment).where(Payment.order_id == paid_id)).one()
+        tickets = db.session.scalars(db.select(Ticket.status).where(Ticket.order_id == paid_id)).all()
+        sold = db.session.get(TicketType, ticket_type_id).sold_count
+
+    print(f'sweeper released {released}; unpaid order {unpaid.order_status}')
+    print(f'paid order {paid.order_status}/{paid.payment_status}, payment {payment.status}, '
+          f'tickets {tickets}, sold {sold}')
+
+    ok = (response.status_code == 202 and released == 1 and unpaid.order_status == 'cancelled'
+          and paid.order_status == 'confirmed' and paid.payment_status == 'completed'
+          and payment.status == 'success' and tickets == ['valid'] and sold == 1)
+    print('OK' if ok else 'PAID ORDER LOST ITS TICKETS')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Fire many concurrent buyers at a small ticket pool and check nobody oversold it.
+
+Seeds an event with one ticket type of --tickets seats (100 by default), then
+has --buyers users (500 by default) each POST a one-ticket order at the same
+time through the real create_order route. Afterwards quantity_sold, the sum of
+order items and the number of issued tickets must all equal the seats that
+were actually sold, and never exceed the total.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set; point it
+at a scratch Postgres database to exercise real row-level concurrency.
+
+With --shards N the ticket type uses N sharded sales counters instead.
+
+    python scripts/oversell_check.py [--buyers 500] [--tickets 100] [--workers 32] [--shards 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'oversell.db')}"
+
+import jwt
+
+from server import create_app
+from server.auth import SECRET_KEY
+from server.config import config
+from server.extensions import db
+from server.models import Event, OrderItem, Role, Ticket, TicketType, User
+from server.utils.inventory import set_sales_shards
+
+
+def seed(buyers, tickets, shards):
+    Role.create_default_roles()
+    organizer = User(username='oversell-organizer', email='oversell-organizer@event360.com', role_id=2)
+    organizer.set_password('oversell')
+    db.session.add(organizer)
+    db.session.flush()
+
+    start = datetime.now(timezone.utc) + timedelta(days=7)
+    event = Event(organizer_id=organizer.id, title='Oversell check', description='Concurrency check',
+                  venue='KICC', city='Nairobi', country='Kenya', start_time=start,
+                  end_time=start + timedelta(hours=3), category='Music', status='approved')
+    db.session.add(event)
+    db.session.flush()
+
+    ticket_type = TicketType(event_id=event.id, name='General', price=1000, quantity_total=tickets,
+                             quantity_sold=0, max_per_user=1)
+    db.session.add(ticket_type)
+    db.session.flush()
+    if shards:
+        set_sales_shards(ticket_type.id, shards)
+
+    # Hashing 500 passwords would dominate the run - the buyers only need tokens
+    db.session.execute(db.insert(User), [{
+        'username': f'buyer{i}',
+        'email': f'buyer{i}@event360.com',
+        'password_hash': organizer.password_hash,
+        'role_id': 3,
+    } for i in range(buyers)])
+    db.session.commit()
+
+    buyer_ids = db.session.scalars(db.select(User.id).where(User.username.like('buyer%'))).all()
+    return ticket_type.id, buyer_ids
+
+
+def token_for(user_id):
+    return jwt.encode({'user_id': user_id, 'exp': datetime.now(timezone.utc) + timedelta(hours=1)}, SECRET_KEY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--buyers', type=int, default=500)
+    parser.add_argument('--tickets', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=32, help='concurrent requests in flight')
+    parser.add_argument('--shards', type=int, default=0, help='sharded sales counters for the ticket type')
+    args = parser.parse_args()
+
+    config['development'].SQLALCHEMY_ECHO = False
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        ticket_type_id, buyer_ids = seed(args.buyers, args.tickets, args.shards)
+
+    client = app.test_client()
+    barrier = threading.Barrier(min(args.workers, len(buyer_ids)))
+
+    def buy(user_id):
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        response = client.post('/api/orders', json={'cart_items': [{'ticket_type_id': ticket_type_id, 'quantity': 1}]},
+                               headers={'Authorization': f'Bearer {token_for(user_id)}'})
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        statuses = Counter(pool.map(buy, buyer_ids))
+
+    with app.app_context():
+        ticket_type = db.session.get(TicketType, ticket_type_id)
+        sold, total = ticket_type.sold_count, ticket_type.quantity_total
+        ordered = db.session.scalar(db.select(db.func.coalesce(db.func.sum(OrderItem.quantity), 0))
+                                    .where(OrderItem.ticket_type_id == ticket_type_id))
+        issued = db.session.scalar(db.select(db.func.count(Ticket.id)).where(Ticket.ticket_type_id == ticket_type_id))
+
+    print(f'{args.buyers} buyers, {args.tickets} tickets, {args.workers} in flight, {args.shards} shards')
+    print('responses: ' + ', '.join(f'{status} x{count}' for status, count in sorted(statuses.items())))
+    print(f'sold {sold}, ordered {ordered}, tickets issued {issued}')
+
+    ok = sold <= total and sold == ordered == issued == statuses[201]
+    print('OK' if ok else 'OVERSOLD OR INCONSISTENT')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 from flask import Flask
 from flask_cors import CORS
-from .extensions import db, bcrypt, cors, migrate
+from .extensions import db, bcrypt, cors, migrate, catalog_cache, waiting_room, mpesa_simulator
 from .config import config
 from .models import Role
 import os
@@ -19,12 +19,16 @@ def create_app(config_name='default'):
     db.init_app(app)
     bcrypt.init_app(app)
     migrate.init_app(app, db)
+    catalog_cache.init_app(app)
+    waiting_room.init_app(app)
+    mpesa_simulator.init_app(app)
     
     # Configure CORS
     CORS(app, 
          resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}},
          supports_credentials=True,
-         allow_headers=["Content-Type", "Authorization"],
+         allow_headers=["Content-Type", "Authorization", "Idempotency-Key"],
+         expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
     config[config_name].init_app(app)
@@ -46,6 +50,7 @@ def create_app(config_name='default'):
     
     register_blueprints(app)
     register_error_handlers(app)
+    register_commands(app)
     
     return app
 
@@ -70,6 +75,12 @@ def register_blueprints(app):
     app.register_blueprint(admin_bp)
     app.register_blueprint(upload_bp)
 
+def register_commands(app):
+    from .commands import all_commands
+    
+    for command in all_commands:
+        app.cli.add_command(command)
+
 def register_error_handlers(app):
     @app.errorhandler(404)
     def not_found(error):
@@ -83,7 +94,7 @@ def register_error_handlers(app):
     def after_request(response):
         """Add CORS headers to every response"""
         response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Idempotency-Key')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response
\ No newline at end of file
@@ -0,0 +1,202 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Create and repopulate the event full-text search index"""
+    from server.utils.search import rebuild_search_index
+
+    try:
+        dialect = rebuild_search_index()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Search index rebuilt ({dialect})')
+
+
+@click.command('check-query-plans')
+@click.option('--verbose', is_flag=True, help='Print the full plan of every query')
+@with_appcontext
+def check_query_plans_command(verbose):
+    """EXPLAIN the hot route queries and fail if any of them needs a sequential scan"""
+    from server.utils.query_plans import check_hot_queries
+
+    failures = 0
+    for name, (plan, seq_scans) in check_hot_queries().items():
+        if seq_scans:
+            failures += 1
+            click.echo(f'FAIL  {name}: sequential scan on {", ".join(seq_scans)}')
+        else:
+            click.echo(f'ok    {name}')
+        if verbose:
+            click.echo(f'      {plan}')
+
+    if failures:
+        raise click.ClickException(f'{failures} hot queries fall back to a sequential scan')
+
+
+@click.command('backfill-ratings')
+@with_appcontext
+def backfill_ratings_command():
+    """Rebuild every event's rating aggregate from its reviews"""
+    from server.models import Event
+
+    updated = Event.rebuild_rating_aggregates()
+    click.echo(f'Rating aggregates rebuilt for {updated} events')
+
+
+@click.command('rebuild-facets')
+@with_appcontext
+def rebuild_facets_command():
+    """Recount the browse facet table from the approved events"""
+    from server.utils.facets import rebuild_facets
+
+    count = rebuild_facets()
+    click.echo(f'Rebuilt {count} facet counts')
+
+
+@click.command('sweep-holds')
+@click.option('--batch-size', type=int, help='Orders released per transaction (default HOLD_SWEEP_BATCH_SIZE)')
+@click.option('--interval', type=int, help='Seconds between sweeps (default HOLD_SWEEP_INTERVAL)')
+@click.option('--loop', is_flag=True, help='Keep sweeping until interrupted instead of running once')
+@with_appcontext
+def sweep_holds_command(batch_size, interval, loop):
+    """Release the tickets held by unpaid orders whose hold has expired"""
+    import time
+    from flask import current_app
+    from server.utils.inventory import sweep_expired_holds
+
+    batch_size = batch_size or current_app.config['HOLD_SWEEP_BATCH_SIZE']
+    interval = interval or current_app.config['HOLD_SWEEP_INTERVAL']
+
+    while True:
+        released = sweep_expired_holds(batch_size)
+        if released or not loop:
+            click.echo(f'Released {released} expired holds')
+        if not loop:
+            return
+        time.sleep(interval)
+
+
+@click.command('shard-ticket-type')
+@click.argument('ticket_type_id', type=int)
+@click.argument('shards', type=click.IntRange(min=0))
+@with_appcontext
+def shard_ticket_type_command(ticket_type_id, shards):
+    """Spread a hot ticket type's sales over SHARDS counter rows (0 merges them back)"""
+    from flask import current_app
+    from server.extensions import db
+    from server.utils.inventory import set_sales_shards
+
+    if shards > current_app.config['MAX_SALES_SHARDS']:
+        raise click.BadParameter(f"at most {current_app.config['MAX_SALES_SHARDS']} (MAX_SALES_SHARDS)",
+                                 param_hint='SHARDS')
+    ticket_type = set_sales_shards(ticket_type_id, shards)
+    if ticket_type is None:
+        raise click.ClickException(f'Ticket type {ticket_type_id} not found')
+    db.session.commit()
+    click.echo(f'{ticket_type.name}: {shards or "no"} sales shards, {ticket_type.available_quantity} available')
+
+
+@click.command('purge-idempotency-keys')
+@click.option('--batch-size', type=int, default=1000, help='Keys deleted per transaction')
+@with_appcontext
+def purge_idempotency_keys_command(batch_size):
+    """Delete idempotency keys whose replay window has passed"""
+    from server.utils.idempotency import purge_expired_keys
+
+    deleted = purge_expired_keys(batch_size)
+    click.echo(f'Deleted {deleted} expired idempotency keys')
+
+
+@click.command('process-payment-callbacks')
+@click.option('--batch-size', type=int, help='Callbacks claimed per transaction (default CALLBACK_BATCH_SIZE)')
+@click.option('--workers', type=int, help='Worker threads claiming batches in parallel (default CALLBACK_WORKERS)')
+@click.option('--interval', type=int, help='Seconds to wait when the inbox is empty (default CALLBACK_POLL_INTERVAL)')
+@click.option('--loop', is_flag=True, help='Keep processing until interrupted instead of draining once')
+@with_appcontext
+def process_payment_callbacks_command(batch_size, workers, interval, loop):
+    """Apply queued payment provider callbacks to their payments and orders"""
+    import threading
+    import time
+    from flask import current_app
+    from server.utils.payment_callbacks import process_callbacks
+
+    app = current_app._get_current_object()
+    batch_size = batch_size or app.config['CALLBACK_BATCH_SIZE']
+    workers = workers or app.config['CALLBACK_WORKERS']
+    interval = interval or app.config['CALLBACK_POLL_INTERVAL']
+    processed = []
+
+    def work():
+        with app.app_context():
+            while True:
+                count = process_callbacks(batch_size)
+                processed.append(count)
+                if not loop:
+                    return
+                if not count:
+                    time.sleep(interval)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    click.echo(f'Processed {sum(processed)} payment callbacks')
+
+
+@click.command('reconcile-payments')
+@click.argument('statement', type=click.Path(exists=True, dir_okay=False))
+@click.option('--provider', default='mpesa', show_default=True, help='Payment provider the statement is from')
+@click.option('--from', 'start', type=click.DateTime(), help='Start of the statement period')
+@click.option('--to', 'end', type=click.DateTime(), help='End of the statement period (exclusive)')
+@click.option('--ref-column', help='Statement column holding the receipt number')
+@click.option('--amount-column', help='Statement column holding the amount')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), help='Write every discrepancy to this CSV')
+@with_appcontext
+def reconcile_payments_command(statement, provider, start, end, ref_column, amount_column, output):
+    """Match a provider settlement statement (CSV) against the payments table"""
+    import csv
+    import time
+    from server.utils.reconciliation import CATEGORIES, read_statement, reconcile
+
+    started = time.monotonic()
+    with open(statement, encoding='utf-8-sig', newline='') as lines:
+        try:
+            parsed = read_statement(lines, ref_column, amount_column)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    result = reconcile(parsed, provider=provider, start=start, end=end)
+
+    click.echo(f"{result['statement_lines']} statement lines ({result['unreadable_lines']} unreadable), "
+               f"{result['payments_checked']} payments, {result['matched']} matched")
+    for category in CATEGORIES:
+        click.echo(f'{category.replace("_", " ")}: {len(result[category])}')
+
+    if output:
+        with open(output, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['category', 'ref', 'statement_amount', 'payment_amount'])
+            for category in CATEGORIES:
+                for entry in result[category]:
+                    if isinstance(entry, dict):
+                        writer.writerow([category, entry['ref'], entry['statement_amount'], entry['payment_amount']])
+                    else:
+                        writer.writerow([category, entry, '', ''])
+        click.echo(f'Discrepancies written to {output}')
+    click.echo(f'Finished in {time.monotonic() - started:.1f}s')
+
+
+all_commands = [
+    rebuild_search_index_command,
+    check_query_plans_command,
+    backfill_ratings_command,
+    rebuild_facets_command,
+    sweep_holds_command,
+    shard_ticket_type_command,
+    purge_idempotency_keys_command,
+    process_payment_callbacks_command,
+    reconcile_payments_command,
+]
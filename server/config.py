@@ -33,6 +33,61 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     
+    # Catalog pagination
+    EVENTS_PAGE_SIZE = int(os.environ.get('EVENTS_PAGE_SIZE', 20))
+    EVENTS_MAX_PAGE_SIZE = int(os.environ.get('EVENTS_MAX_PAGE_SIZE', 100))
+    REVIEWS_EMBED_LIMIT = int(os.environ.get('REVIEWS_EMBED_LIMIT', 5))  # latest reviews embedded in event detail
+    
+    # Catalog response cache - in-process LRU, shared through Redis when CACHE_REDIS_URL is set
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', 1024))
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 60))
+    EVENT_DETAIL_CACHE_TTL = int(os.environ.get('EVENT_DETAIL_CACHE_TTL', 15))  # detail carries ticket availability
+    
+    # Waiting room for high-demand events - buyers admitted per second, how long an
+    # admitted buyer has to place an order, and how long a place in line is kept
+    WAITING_ROOM_ADMIT_RATE = int(os.environ.get('WAITING_ROOM_ADMIT_RATE', 10))
+    WAITING_ROOM_PURCHASE_WINDOW = int(os.environ.get('WAITING_ROOM_PURCHASE_WINDOW', 5 * 60))
+    WAITING_ROOM_QUEUE_TTL = int(os.environ.get('WAITING_ROOM_QUEUE_TTL', 6 * 60 * 60))
+    
+    # Unpaid orders hold their tickets for ORDER_HOLD_TTL seconds; `flask sweep-holds`
+    # releases expired holds HOLD_SWEEP_BATCH_SIZE orders at a time every HOLD_SWEEP_INTERVAL seconds
+    ORDER_HOLD_TTL = int(os.environ.get('ORDER_HOLD_TTL', 15 * 60))
+    # Starting a payment re-holds the order for PAYMENT_HOLD_TTL seconds, long enough
+    # for the provider's callback (and its retries) to confirm it before the sweeper runs
+    PAYMENT_HOLD_TTL = int(os.environ.get('PAYMENT_HOLD_TTL', 30 * 60))
+    HOLD_SWEEP_BATCH_SIZE = int(os.environ.get('HOLD_SWEEP_BATCH_SIZE', 1000))
+    HOLD_SWEEP_INTERVAL = int(os.environ.get('HOLD_SWEEP_INTERVAL', 10))
+    
+    # Upper bound for a ticket type's sharded sales counters (sales_shards)
+    MAX_SALES_SHARDS = int(os.environ.get('MAX_SALES_SHARDS', 64))
+    
+    # Idempotency-Key support for order and payment creation - how long responses are
+    # replayed, how long a retry waits on an in-flight request, and after how long an
+    # unfinished request is considered dead
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+    IDEMPOTENCY_WAIT_TIMEOUT = int(os.environ.get('IDEMPOTENCY_WAIT_TIMEOUT', 10))
+    IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+    
+    # Rows fetched per server-side cursor round trip by the admin order export
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    
+    # Payment callback workers (`flask process-payment-callbacks`)
+    CALLBACK_BATCH_SIZE = int(os.environ.get('CALLBACK_BATCH_SIZE', 100))
+    CALLBACK_WORKERS = int(os.environ.get('CALLBACK_WORKERS', 4))
+    CALLBACK_POLL_INTERVAL = int(os.environ.get('CALLBACK_POLL_INTERVAL', 1))
+    
+    # Local M-Pesa stand-in (development and load tests only): STK pushes are
+    # answered by server/utils/mpesa_simulator.py, whose callbacks arrive after a
+    # random delay in [MIN, MAX] seconds, fail or repeat at the given rates, and are
+    # POSTed to MPESA_CALLBACK_URL (in-process when unset)
+    MPESA_SIMULATOR = os.environ.get('MPESA_SIMULATOR', '').lower() in ('1', 'true', 'yes')
+    MPESA_SIM_MIN_LATENCY = float(os.environ.get('MPESA_SIM_MIN_LATENCY', 1))
+    MPESA_SIM_MAX_LATENCY = float(os.environ.get('MPESA_SIM_MAX_LATENCY', 5))
+    MPESA_SIM_FAILURE_RATE = float(os.environ.get('MPESA_SIM_FAILURE_RATE', 0.1))
+    MPESA_SIM_DUPLICATE_RATE = float(os.environ.get('MPESA_SIM_DUPLICATE_RATE', 0.05))
+    MPESA_CALLBACK_URL = os.environ.get('MPESA_CALLBACK_URL')
+    
     APP_NAME = 'Event360'
     DEBUG = os.environ.get('FLASK_ENV') == 'development'
     
@@ -52,6 +107,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     SESSION_COOKIE_SECURE = True
+    MPESA_SIMULATOR = False  # never fake payments in production
     
     @staticmethod
     def init_app(app):
@@ -2,8 +2,14 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_migrate import Migrate
+from .utils.cache import CatalogCache
+from .utils.waiting_room import WaitingRoom
+from .utils.mpesa_simulator import MpesaSimulator
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 cors = CORS()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+catalog_cache = CatalogCache()
+waiting_room = WaitingRoom()
+mpesa_simulator = MpesaSimulator()
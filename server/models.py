@@ -33,7 +33,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     phone = db.Column(db.String(20))
     password_hash = db.Column(db.String(255), nullable=False)
-    role_id = db.Column(db.Integer, db.ForeignKey("roles.id"), nullable=False, default=1)  # Default to attendee
+    role_id = db.Column(db.Integer, db.ForeignKey("roles.id"), nullable=False, default=1, index=True)  # Default to attendee
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     avatar_url = db.Column(db.String(255))
@@ -69,7 +69,7 @@ class Event(db.Model):
     __tablename__ = "events"
     
     id = db.Column(db.Integer, primary_key=True)
-    organizer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    organizer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     venue = db.Column(db.String(200))
@@ -86,6 +86,17 @@ class Event(db.Model):
     banner_url = db.Column(db.String(255))
     capacity = db.Column(db.Integer)
     is_public = db.Column(db.Boolean, default=True)
+    high_demand = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # orders go through the waiting room
+    # Denormalized rating aggregate, maintained by Event.record_rating
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Full-text search data (search_vector on Postgres, events_fts on SQLite) is
+    # maintained by the database itself - see server/utils/search.py
 
     organizer = db.relationship("User", back_populates="events")
     orders = db.relationship("Order", back_populates="event")
@@ -95,6 +106,60 @@ class Event(db.Model):
     reviews = db.relationship("Review", back_populates="event")
     wishlist_items = db.relationship("Wishlist", back_populates="event")
 
+    __table_args__ = (
+        # Catalog listing: status filter, (start_time, id) keyset order
+        db.Index('ix_events_status_start_time', 'status', 'start_time', 'id'),
+        db.Index('ix_events_status_category_start_time', 'status', 'category', 'start_time'),
+        db.Index('ix_events_status_city_start_time', 'status', 'city', 'start_time'),
+        # Public catalog default - only approved events
+        db.Index('ix_events_approved_start_time', 'start_time', 'id',
+                 postgresql_where=db.text("status = 'approved'"),
+                 sqlite_where=db.text("status = 'approved'")),
+    )
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+    
+    @property
+    def rating_histogram(self):
+        return {str(star): getattr(self, f'rating_{star}') or 0 for star in range(1, 6)}
+    
+    @staticmethod
+    def record_rating(event_id, rating):
+        """Add one rating to the event's aggregate in a single atomic UPDATE"""
+        star = getattr(Event, f'rating_{rating}')
+        db.session.execute(
+            db.update(Event)
+            .where(Event.id == event_id)
+            .values({
+                Event.rating_count: Event.rating_count + 1,
+                Event.rating_sum: Event.rating_sum + rating,
+                star: star + 1,
+            })
+        )
+    
+    @staticmethod
+    def rebuild_rating_aggregates():
+        """Recompute every event's rating aggregate from the reviews table"""
+        def reviews_subquery(column, *criteria):
+            return (db.select(column)
+                    .where(Review.event_id == Event.id, *criteria)
+                    .scalar_subquery())
+        
+        values = {
+            Event.rating_count: reviews_subquery(db.func.count(Review.id)),
+            Event.rating_sum: reviews_subquery(db.func.coalesce(db.func.sum(Review.rating), 0)),
+        }
+        for star in range(1, 6):
+            values[getattr(Event, f'rating_{star}')] = reviews_subquery(db.func.count(Review.id), Review.rating == star)
+        
+        result = db.session.execute(db.update(Event).values(values))
+        db.session.commit()
+        return result.rowcount
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -112,15 +177,26 @@ class Event(db.Model):
             'poster_url': self.poster_url,
             'banner_url': self.banner_url,
             'capacity': self.capacity,
+            'high_demand': self.high_demand,
+            'average_rating': self.average_rating,
+            'review_count': self.rating_count or 0,
             'created_at': self.created_at.isoformat()
         }
 
+class EventFacetCount(db.Model):
+    """Approved-event counts per browse facet, kept current by server/utils/facets.py"""
+    __tablename__ = "event_facet_counts"
+    
+    dimension = db.Column(db.String(20), primary_key=True)  # category, city, month
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
 class EventApproval(db.Model):
     __tablename__ = "event_approvals"
 
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
-    admin_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False, index=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     status = db.Column(db.String(50), nullable=False)  # approved, rejected
     comment = db.Column(db.Text)
     decided_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
@@ -132,7 +208,7 @@ class TicketType(db.Model):
     __tablename__ = "ticket_types"
 
     id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.id"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Numeric(10, 2), nullable=False)
@@ -143,14 +219,52 @@ class TicketType(db.Model):
     access_level = db.Column(db.String(50), default="general")
     is_active = db.Column(db.Boolean, default=True)
     max_per_user = db.Column(db.Integer, default=10)
+    # Opt-in for hot ticket types: > 0 spreads new sales over that many
+    # ticket_type_shards rows, see server/utils/inventory.py
+    sales_shards = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     event = db.relationship("Event", back_populates="ticket_types")
     tickets = db.relationship("Ticket", back_populates="ticket_type")
     order_items = db.relationship("OrderItem", back_populates="ticket_type")
+    shards = db.relationship("TicketTypeShard", order_by="TicketTypeShard.shard")
+
+    @property
+    def sold_count(self):
+        # quantity_sold holds the sales made before the type was sharded
+        sold = self.quantity_sold or 0
+        if self.sales_shards:
+            sold += sum(shard.sold for shard in self.shards)
+        return sold
 
     @property
     def available_quantity(self):
-        return self.quantity_total - self.quantity_sold
+        return self.quantity_total - self.sold_count
+
+class TicketTypeShard(db.Model):
+    """One slice of a sharded ticket type's inventory.
+
+    Each shard may sell up to its own allotment, and the allotments plus the
+    ticket type's quantity_sold add up to quantity_total, so the hard cap
+    holds without buyers ever writing to the same row.
+    """
+    __tablename__ = "ticket_type_shards"
+
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey("ticket_types.id"), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True)
+    allotted = db.Column(db.Integer, nullable=False)
+    sold = db.Column(db.Integer, nullable=False, default=0)
+
+class UserTicketPurchase(db.Model):
+    """Tickets a user holds of a ticket type across all their live orders, for max_per_user.
+
+    Kept in step with orders by server/utils/purchase_limits.py, in the same
+    transaction as order creation, cancellation and hold expiry.
+    """
+    __tablename__ = "user_ticket_purchases"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey("ticket_types.id"), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
 
 class Order(db.Model):
     __tablename__ = "orders"
@@ -164,19 +278,40 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, onupdate=lambda: datetime.now(timezone.utc))
     reference = db.Column(db.String(100), unique=True, default=lambda: f"ORD-{uuid.uuid4().hex[:8].upper()}")
+    hold_expires_at = db.Column(db.DateTime)  # unpaid orders give their tickets back after this
+    # Bumped on every write - status changes go through server/utils/order_states.py
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     user = db.relationship("User", back_populates="orders")
     event = db.relationship("Event", back_populates="orders")
-    payment = db.relationship("Payment", back_populates="order", uselist=False)
+    # A failed payment can be retried, so an order may collect several attempts
+    payments = db.relationship("Payment", back_populates="order", order_by="(Payment.created_at, Payment.id)")
     tickets = db.relationship("Ticket", back_populates="order")
     order_items = db.relationship("OrderItem", back_populates="order")
 
+    @property
+    def payment(self):
+        """The latest payment attempt, or None"""
+        return self.payments[-1] if self.payments else None
+
+    __table_args__ = (
+        db.Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+        db.Index('ix_orders_event_id', 'event_id'),
+        db.Index('ix_orders_created_at', 'created_at'),
+        # Only live holds are indexed - the sweeper's scan stays small however many orders exist
+        db.Index('ix_orders_pending_hold_expires_at', 'hold_expires_at',
+                 postgresql_where=db.text("order_status = 'processing'"),
+                 sqlite_where=db.text("order_status = 'processing'")),
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
 class OrderItem(db.Model):
     __tablename__ = "order_items"
     
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
-    ticket_type_id = db.Column(db.Integer, db.ForeignKey("ticket_types.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey("ticket_types.id"), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     unit_price = db.Column(db.Numeric(10, 2), nullable=False)
     subtotal = db.Column(db.Numeric(10, 2), nullable=False)
@@ -188,22 +323,57 @@ class Payment(db.Model):
     __tablename__ = "payments"
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
     provider = db.Column(db.String(50))  # mpesa, stripe, paypal
-    provider_ref = db.Column(db.String(100))
+    provider_ref = db.Column(db.String(100), index=True)
+    provider_receipt = db.Column(db.String(100))  # e.g. M-Pesa receipt number, set by the callback
     amount = db.Column(db.Numeric(10, 2))
     status = db.Column(db.String(50), default='pending')  # pending, successful, failed
-    raw_payload = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
-    order = db.relationship("Order", back_populates="payment")
+    order = db.relationship("Order", back_populates="payments")
+
+class PaymentPayload(db.Model):
+    """Raw request body behind a payment, kept only for audits.
+
+    Append-only and stored zlib-compressed (server/utils/payment_payloads.py)
+    so the payments row stays small; only the audit endpoint reads it back."""
+    __tablename__ = "payment_payloads"
+
+    id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey("payments.id"), nullable=False, index=True)
+    source = db.Column(db.String(20), nullable=False)  # request
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+class PaymentCallback(db.Model):
+    """Raw provider callback, stored as received and applied later by
+    `flask process-payment-callbacks` (server/utils/payment_callbacks.py)"""
+    __tablename__ = "payment_callbacks"
+
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processing, processed, unmatched, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    received_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    processed_at = db.Column(db.DateTime)
+    next_attempt_at = db.Column(db.DateTime)  # set while a retried callback waits for its next try
+
+    __table_args__ = (
+        # Workers claim the oldest pending callbacks - only those are indexed
+        db.Index('ix_payment_callbacks_pending', 'id',
+                 postgresql_where=db.text("status = 'pending'"),
+                 sqlite_where=db.text("status = 'pending'")),
+    )
 
 class Ticket(db.Model):
     __tablename__ = "tickets"
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
-    ticket_type_id = db.Column(db.Integer, db.ForeignKey("ticket_types.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey("ticket_types.id"), nullable=False, index=True)
     code = db.Column(db.String(100), unique=True, nullable=False, default=lambda: f"TKT-{uuid.uuid4().hex[:12].upper()}")
     qr_image_url = db.Column(db.String(255))
     status = db.Column(db.String(50), default="valid")  # valid, used, cancelled
@@ -230,6 +400,7 @@ class EventRegistration(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'event_id', name='unique_user_event_registration'),
+        db.Index('ix_event_registrations_event_id', 'event_id'),
     )
 
 class Review(db.Model):
@@ -247,6 +418,7 @@ class Review(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'event_id', name='unique_user_event_review'),
+        db.Index('ix_reviews_event_id_created_at', 'event_id', 'created_at'),
     )
 
 class Wishlist(db.Model):
@@ -262,6 +434,7 @@ class Wishlist(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'event_id', name='unique_user_event_wishlist'),
+        db.Index('ix_wishlists_event_id', 'event_id'),
     )
 
 class Notification(db.Model):
@@ -275,4 +448,21 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
-    user = db.relationship("User", back_populates="notifications")
\ No newline at end of file
+    user = db.relationship("User", back_populates="notifications")
+    
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+
+class IdempotencyKey(db.Model):
+    """Outcome of a request sent with an Idempotency-Key header, see server/utils/idempotency.py"""
+    __tablename__ = "idempotency_keys"
+    
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of user, endpoint and header value
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    status = db.Column(db.String(20), nullable=False, default='in_progress')  # in_progress, done
+    response_code = db.Column(db.SmallInteger)
+    response_body = db.Column(db.Text)
+    locked_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -1,8 +1,13 @@
-from flask import Blueprint, request, jsonify
-from server.extensions import db
-from server.models import Event, EventApproval, User, Role, Notification, Order
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
+from server.extensions import db, catalog_cache
+from server.models import Event, EventApproval, User, Role, Notification, Order, Payment
 from server.auth import token_required, role_required
+from server.utils.facets import event_facets, apply_facet_delta
+from server.utils.order_export import order_export_query, stream_order_export
+from server.utils.reconciliation import read_statement, reconcile, summarize
+from server.utils.payment_payloads import payment_payloads
 from datetime import datetime, timezone
+import io
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 @admin_bp.route('/create-first-admin', methods=['POST'])
@@ -97,9 +102,11 @@ def seed_database():
             event = Event(**event_data)
             db.session.add(event)
             db.session.flush()
+            apply_facet_delta(event_facets(event), 1)
             created_events.append(event.to_dict())
         
         db.session.commit()
+        catalog_cache.invalidate()
         
         return jsonify({
             'message': 'Database seeded successfully',
@@ -148,6 +155,9 @@ def approve_event(event_id):
     event.status = 'approved' if action == 'approve' else 'rejected'
     event.updated_at = datetime.now(timezone.utc)
     
+    if event.status == 'approved':
+        apply_facet_delta(event_facets(event), 1)
+    
     # Create approval record
     approval = EventApproval(
         event_id=event_id,
@@ -168,6 +178,7 @@ def approve_event(event_id):
     db.session.add(notification)
     
     db.session.commit()
+    catalog_cache.invalidate()
     
     return jsonify({
         'message': f'Event {event.status} successfully',
@@ -277,6 +288,76 @@ def get_all_orders():
     
     return jsonify(orders_data), 200
 
+@admin_bp.route('/orders/export', methods=['GET'])
+@token_required
+@role_required('admin')
+def export_orders():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    # Optional created_at range (ISO dates or datetimes, end exclusive) and status filters
+    try:
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to date'}), 400
+    
+    query = order_export_query(start, end,
+                               payment_status=request.args.get('payment_status'),
+                               order_status=request.args.get('order_status'))
+    chunks = stream_order_export(query, fmt, current_app.config['EXPORT_BATCH_SIZE'])
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=orders.{fmt}'
+    return response
+
+@admin_bp.route('/payments/reconcile', methods=['POST'])
+@token_required
+@role_required('admin')
+def reconcile_payments():
+    # Statement CSV as the 'statement' multipart file, read line by line
+    upload = request.files.get('statement')
+    if upload is None:
+        return jsonify({'error': 'statement file is required'}), 400
+    
+    try:
+        start = datetime.fromisoformat(request.form['from']) if request.form.get('from') else None
+        end = datetime.fromisoformat(request.form['to']) if request.form.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to date'}), 400
+    
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    try:
+        statement = read_statement(lines,
+                                   ref_column=request.form.get('ref_column'),
+                                   amount_column=request.form.get('amount_column'))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': f'Unreadable statement: {e}'}), 400
+    
+    result = reconcile(statement, provider=request.form.get('provider', 'mpesa'), start=start, end=end)
+    sample_size = request.form.get('sample_size', 100, type=int)
+    return jsonify(summarize(result, sample_size)), 200
+
+@admin_bp.route('/payments/<int:payment_id>/audit', methods=['GET'])
+@token_required
+@role_required('admin')
+def audit_payment(payment_id):
+    payment = Payment.query.get_or_404(payment_id)
+    
+    return jsonify({
+        'id': payment.id,
+        'order_id': payment.order_id,
+        'provider': payment.provider,
+        'provider_ref': payment.provider_ref,
+        'amount': float(payment.amount) if payment.amount else None,
+        'status': payment.status,
+        'created_at': payment.created_at.isoformat(),
+        # Raw payloads live in their own table and are only loaded here
+        'payloads': payment_payloads(payment.id)
+    }), 200
+
 @admin_bp.route('/statistics', methods=['GET'])
 @token_required
 @role_required('admin')
@@ -1,88 +1,18 @@
 # server/routes/event_routes.py
-from flask import Blueprint, request, jsonify
-from server.extensions import db
-from server.models import Event, User, EventApproval, TicketType, Review, Wishlist, EventRegistration
+from flask import Blueprint, request, jsonify, current_app, redirect, url_for
+from server.extensions import db, catalog_cache, waiting_room
+from server.models import Event, User, EventApproval, TicketType, TicketTypeShard, Review, Wishlist, EventRegistration
 from server.auth import token_required, role_required
+from server.utils.pagination import keyset_paginate, parse_limit, InvalidCursor
+from server.utils.search import apply_search
+from server.utils.http_cache import weak_etag, not_modified, with_etag
+from server.utils.facets import event_facets, apply_facet_delta, get_facets
+from server.utils.event_listing import event_list_query, serialize_event_row
+from server.utils.inventory import set_sales_shards
+from server.utils.posters import generate_event_background, generated_poster_url, is_generated_poster, poster_digest
 from datetime import datetime, timezone
 import re
-
-import random
-import base64
-
-def generate_event_background(title, category):
-    """Generate a cool gradient background based on event title and category"""
-    
-    # Define color palettes for different categories
-    category_colors = {
-        'Music': [('#667eea', '#764ba2'), ('#f093fb', '#f5576c')],
-        'Conference': [('#4facfe', '#00f2fe'), ('#667eea', '#764ba2')],
-        'Workshop': [('#43e97b', '#38f9d7'), ('#fa709a', '#fee140')],
-        'Sports': [('#fa709a', '#fee140'), ('#f093fb', '#f5576c')],
-        'Networking': [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe')],
-        'Art': [('#f093fb', '#f5576c'), ('#fa709a', '#fee140')],
-        'Food': [('#fa709a', '#fee140'), ('#43e97b', '#38f9d7')],
-        'Technology': [('#4facfe', '#00f2fe'), ('#667eea', '#764ba2')],
-        'Business': [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe')],
-        'Education': [('#43e97b', '#38f9d7'), ('#4facfe', '#00f2fe')]
-    }
-    
-    # Get colors for category or use default
-    if category in category_colors:
-        colors = category_colors[category]
-    else:
-        colors = [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe'), 
-                  ('#43e97b', '#38f9d7'), ('#fa709a', '#fee140')]
-    
-    # Pick a color based on title hash
-    title_hash = hash(title) if title else random.randint(0, 1000)
-    color_index = title_hash % len(colors)
-    gradient_colors = colors[color_index]
-    
-    # Create an SVG gradient background
-    svg = f'''
-    <svg xmlns="http://www.w3.org/2000/svg" width="800" height="600" viewBox="0 0 800 600">
-        <defs>
-            <linearGradient id="grad" x1="0%" y1="0%" x2="100%" y2="100%">
-                <stop offset="0%" stop-color="{gradient_colors[0]}" />
-                <stop offset="100%" stop-color="{gradient_colors[1]}" />
-            </linearGradient>
-        </defs>
-        
-        <rect width="100%" height="100%" fill="url(#grad)"/>
-        
-        <!-- Decorative circles -->
-        <circle cx="100" cy="100" r="60" fill="white" opacity="0.1"/>
-        <circle cx="700" cy="500" r="80" fill="white" opacity="0.1"/>
-        <circle cx="600" cy="100" r="40" fill="white" opacity="0.1"/>
-        
-        <!-- Event title -->
-        <text x="400" y="300" 
-              font-family="Arial, sans-serif" 
-              font-size="48" 
-              font-weight="bold"
-              fill="white" 
-              text-anchor="middle" 
-              dominant-baseline="middle">
-            {title}
-        </text>
-        
-        <!-- Category badge -->
-        <rect x="350" y="350" width="100" height="30" rx="15" fill="white" opacity="0.2"/>
-        <text x="400" y="365" 
-              font-family="Arial, sans-serif" 
-              font-size="14" 
-              fill="white" 
-              text-anchor="middle" 
-              dominant-baseline="middle">
-            {category}
-        </text>
-    </svg>
-    '''
-    
-    # Convert SVG to data URL
-    svg_bytes = svg.encode('utf-8')
-    svg_encoded = base64.b64encode(svg_bytes).decode('utf-8')
-    return f"data:image/svg+xml;base64,{svg_encoded}"
+import time
 
 event_bp = Blueprint('events', __name__, url_prefix='/api/events')
 
@@ -94,48 +24,159 @@ def get_all_events():
     city = request.args.get('city')
     search = request.args.get('search')
     upcoming = request.args.get('upcoming', 'true').lower() == 'true'
-    
-    # Build query
-    query = Event.query
+    cursor = request.args.get('cursor')
+    limit = parse_limit(request.args.get('limit'),
+                        current_app.config['EVENTS_PAGE_SIZE'],
+                        current_app.config['EVENTS_MAX_PAGE_SIZE'])
+    
+    # Serve from the catalog cache when this exact (normalized) query was answered recently
+    cache_key = catalog_cache.make_key('events', {
+        'category': category, 'status': status, 'city': city, 'search': search,
+        'upcoming': upcoming, 'cursor': cursor, 'limit': limit
+    })
+    
+    # The key embeds the catalog version; the time bucket covers events dropping out of 'upcoming'
+    etag = weak_etag(cache_key, int(time.time() // current_app.config['CATALOG_CACHE_TTL']))
+    cached_response = not_modified(etag)
+    if cached_response:
+        return cached_response
+    
+    page = catalog_cache.get(cache_key)
+    if page is None:
+        try:
+            page = _query_events_page(category, status, city, search, upcoming, cursor, limit)
+        except InvalidCursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        catalog_cache.set(cache_key, page)
+    
+    response = jsonify(page['events'])
+    if page['next_cursor']:
+        response.headers['X-Next-Cursor'] = page['next_cursor']
+    return with_etag(response, etag), 200
+
+def _query_events_page(category, status, city, search, upcoming, cursor, limit):
+    # Build query - list view columns only, organizer joined in
+    query = event_list_query()
     
     if status:
-        query = query.filter_by(status=status)
+        query = query.filter(Event.status == status)
     
     if category:
-        query = query.filter_by(category=category)
+        query = query.filter(Event.category == category)
     
     if city:
-        query = query.filter_by(city=city)
+        query = query.filter(Event.city == city)
     
+    rank = None
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            db.or_(
-                Event.title.ilike(search_term),
-                Event.description.ilike(search_term),
-                Event.venue.ilike(search_term),
-                Event.category.ilike(search_term)
-            )
-        )
+        query, rank = apply_search(query, search)
     
     if upcoming:
         query = query.filter(Event.start_time > datetime.now(timezone.utc))
     
-    # Sort by date
-    query = query.order_by(Event.start_time.asc())
+    # Keyset pagination - by relevance when searching, otherwise by (start_time, id).
+    # The cursor for the next page is passed back via X-Next-Cursor
+    if rank is not None:
+        keys = [(rank, True), (Event.id, False)]
+        key_values = lambda row: (row.search_rank, row.id)
+    else:
+        keys = [(Event.start_time, False), (Event.id, False)]
+        key_values = None
+    
+    rows, next_cursor = keyset_paginate(query, keys, cursor, limit, key_values)
+    
+    return {
+        'events': [serialize_event_row(row) for row in rows],
+        'next_cursor': next_cursor
+    }
+
+@event_bp.route('/facets', methods=['GET'])
+def get_event_facets():
+    # Served from the maintained event_facet_counts table, not by scanning events
+    return jsonify(get_facets()), 200
+
+@event_bp.route('/<int:event_id>/poster.svg', methods=['GET'])
+def get_event_poster(event_id):
+    event = db.session.query(Event.title, Event.category).filter(Event.id == event_id).first()
+    if event is None:
+        return jsonify({'error': 'Not found'}), 404
+    
+    svg = generate_event_background(event.title, event.category)
+    digest = poster_digest(svg)
+    
+    # Only the URL carrying the current digest (?v=) is immutable - a stale or
+    # missing one is sent on to it rather than cached against today's poster
+    if request.args.get('v') != digest:
+        response = redirect(url_for('events.get_event_poster', event_id=event_id, v=digest))
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    response = current_app.response_class(svg, mimetype='image/svg+xml')
+    response.set_etag(digest)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response.make_conditional(request)
+
+@event_bp.route('/<int:event_id>/queue', methods=['POST'])
+@token_required
+def join_waiting_room(event_id):
+    event = db.session.get(Event, event_id)
+    if event is None:
+        return jsonify({'error': 'Not found'}), 404
+    
+    if not event.high_demand:
+        return jsonify({'error': 'This event has no waiting room'}), 400
     
-    events = query.all()
-    return jsonify([event.to_dict() for event in events]), 200
+    return jsonify(waiting_room.join(event_id, request.current_user.id)), 200
+
+@event_bp.route('/<int:event_id>/queue', methods=['GET'])
+def get_queue_position(event_id):
+    # Polled by everyone in line - answered from the queue ticket and the shared backend only
+    status = waiting_room.status(event_id, request.args.get('ticket', ''))
+    if status is None:
+        return jsonify({'error': 'Invalid queue ticket'}), 400
+    
+    response = jsonify(status)
+    response.headers['Cache-Control'] = 'no-store'
+    if status['status'] == 'waiting':
+        response.headers['Retry-After'] = str(status['retry_after'])
+    return response, 200
 
 @event_bp.route('/<int:event_id>', methods=['GET'])
 def get_event(event_id):
+    # Validate the client's copy with a narrow query before building anything
+    tickets_sold = db.select(db.func.coalesce(db.func.sum(TicketType.quantity_sold), 0)) \
+        .where(TicketType.event_id == Event.id).scalar_subquery()
+    shard_tickets_sold = db.select(db.func.coalesce(db.func.sum(TicketTypeShard.sold), 0)) \
+        .join(TicketType, TicketType.id == TicketTypeShard.ticket_type_id) \
+        .where(TicketType.event_id == Event.id).scalar_subquery()
+    version = db.session.query(Event.updated_at, Event.created_at, tickets_sold, shard_tickets_sold) \
+        .filter(Event.id == event_id).first()
+    if version is None:
+        return jsonify({'error': 'Not found'}), 404
+    
+    etag = weak_etag('event', event_id, *version, catalog_cache.version())
+    cached_response = not_modified(etag)
+    if cached_response:
+        return cached_response
+    
+    ttl = current_app.config['EVENT_DETAIL_CACHE_TTL']
+    # Keyed on the ETag too, so sales and edits never serve a body older than its ETag
+    cache_key = catalog_cache.make_key('event', {'id': event_id, 'etag': etag})
+    event_data = catalog_cache.get(cache_key, ttl)
+    if event_data is None:
+        event_data = _build_event_detail(event_id)
+        catalog_cache.set(cache_key, event_data, ttl)
+    
+    return with_etag(jsonify(event_data), etag), 200
+
+def _build_event_detail(event_id):
     event = Event.query.get_or_404(event_id)
     
     # Get ticket types
     ticket_types = TicketType.query.filter_by(event_id=event_id, is_active=True).all()
     
-    # Get reviews with user info
-    reviews = Review.query.filter_by(event_id=event_id).all()
+    # Only the latest reviews are embedded, the rest are paged via /<id>/reviews
+    reviews, reviews_cursor = _reviews_page(event_id, None, current_app.config['REVIEWS_EMBED_LIMIT'])
     
     event_data = event.to_dict()
     event_data['ticket_types'] = [{
@@ -149,28 +190,57 @@ def get_event(event_id):
         'max_per_user': tt.max_per_user
     } for tt in ticket_types]
     
-    event_data['reviews'] = [{
-        'id': review.id,
+    event_data['reviews'] = reviews
+    event_data['reviews_next_cursor'] = reviews_cursor
+    
+    # Rating summary comes from the aggregate on the event row
+    event_data['rating_histogram'] = event.rating_histogram
+    
+    return event_data
+
+def _reviews_page(event_id, cursor, limit):
+    """One page of an event's reviews, newest first, with the author joined in the same query"""
+    query = db.session.query(
+        Review.id, Review.rating, Review.comment, Review.created_at,
+        User.id.label('user_id'), User.username, User.avatar_url
+    ).join(User, Review.user_id == User.id).filter(Review.event_id == event_id)
+    
+    rows, next_cursor = keyset_paginate(
+        query, [(Review.created_at, True), (Review.id, True)], cursor, limit
+    )
+    
+    reviews = [{
+        'id': row.id,
         'user': {
-            'id': review.user.id,
-            'username': review.user.username,
-            'avatar_url': review.user.avatar_url
+            'id': row.user_id,
+            'username': row.username,
+            'avatar_url': row.avatar_url
         },
-        'rating': review.rating,
-        'comment': review.comment,
-        'created_at': review.created_at.isoformat()
-    } for review in reviews]
-    
-    # Calculate average rating
-    if reviews:
-        avg_rating = sum(review.rating for review in reviews) / len(reviews)
-        event_data['average_rating'] = round(avg_rating, 1)
-        event_data['review_count'] = len(reviews)
-    else:
-        event_data['average_rating'] = 0
-        event_data['review_count'] = 0
+        'rating': row.rating,
+        'comment': row.comment,
+        'created_at': row.created_at.isoformat()
+    } for row in rows]
     
-    return jsonify(event_data), 200
+    return reviews, next_cursor
+
+@event_bp.route('/<int:event_id>/reviews', methods=['GET'])
+def get_event_reviews(event_id):
+    Event.query.get_or_404(event_id)
+    
+    cursor = request.args.get('cursor')
+    limit = parse_limit(request.args.get('limit'),
+                        current_app.config['EVENTS_PAGE_SIZE'],
+                        current_app.config['EVENTS_MAX_PAGE_SIZE'])
+    
+    try:
+        reviews, next_cursor = _reviews_page(event_id, cursor, limit)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    response = jsonify(reviews)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 @event_bp.route('', methods=['POST'])
 @token_required
@@ -204,13 +274,15 @@ def create_event():
     
     # Price validation for ticket types (if provided)
     ticket_types = data.get('ticket_types', [])
+    max_shards = current_app.config['MAX_SALES_SHARDS']
     for tt in ticket_types:
         if tt.get('price') is not None and float(tt['price']) < 0:
             return jsonify({'error': 'Ticket price cannot be negative'}), 400
+        shards = tt.get('sales_shards') or 0
+        if isinstance(shards, bool) or not isinstance(shards, int) or not 0 <= shards <= max_shards:
+            return jsonify({'error': f'sales_shards must be a whole number from 0 to {max_shards}'}), 400
     
     poster_url = data.get('poster_url')
-    if not poster_url:
-        poster_url = generate_event_background(data['title'], data['category'])
     
     # Create event
     event = Event(
@@ -228,10 +300,17 @@ def create_event():
         banner_url=data.get('banner_url'),
         capacity=data.get('capacity'),
         is_public=data.get('is_public', True),
+        high_demand=bool(data.get('high_demand', False)),
         status='pending'  # Events need admin approval
     )
     
     db.session.add(event)
+    db.session.flush()  # Get the ID for the poster URL
+    
+    # Without an uploaded poster, point at the generated one instead of inlining it
+    if not poster_url:
+        event.poster_url = generated_poster_url(event.id, event.title, event.category)
+    
     db.session.commit()
     
     # Create ticket types if provided
@@ -248,8 +327,14 @@ def create_event():
             max_per_user=tt_data.get('max_per_user', 10)
         )
         db.session.add(ticket_type)
+        
+        # Hot ticket types can opt into sharded sales counters
+        if tt_data.get('sales_shards'):
+            db.session.flush()
+            set_sales_shards(ticket_type.id, tt_data['sales_shards'])
     
     db.session.commit()
+    catalog_cache.invalidate()
     
     return jsonify({
         'message': 'Event created successfully and sent for approval',
@@ -267,9 +352,12 @@ def update_event(event_id):
     
     data = request.get_json()
     
+    # Remember what the event is currently counted under in the browse facets
+    old_facets = event_facets(event) if event.status == 'approved' else []
+    
     # Update allowed fields
     allowed_fields = ['title', 'description', 'venue', 'address', 'city', 'country',
-                     'category', 'poster_url', 'banner_url', 'capacity', 'is_public']
+                     'category', 'poster_url', 'banner_url', 'capacity', 'is_public', 'high_demand']
     
     for field in allowed_fields:
         if field in data:
@@ -292,8 +380,18 @@ def update_event(event_id):
     if data.get('major_changes', False):
         event.status = 'pending'
     
+    # A generated poster shows the title and category, so its URL changes with them
+    if is_generated_poster(event.poster_url, event.id):
+        event.poster_url = generated_poster_url(event.id, event.title, event.category)
+    
+    new_facets = event_facets(event) if event.status == 'approved' else []
+    if old_facets != new_facets:
+        apply_facet_delta(old_facets, -1)
+        apply_facet_delta(new_facets, 1)
+    
     event.updated_at = datetime.now(timezone.utc)
     db.session.commit()
+    catalog_cache.invalidate()
     
     return jsonify({
         'message': 'Event updated successfully',
@@ -313,8 +411,12 @@ def delete_event(event_id):
     if event.orders and len(event.orders) > 0:
         return jsonify({'error': 'Cannot delete event with existing orders. Cancel instead.'}), 400
     
+    if event.status == 'approved':
+        apply_facet_delta(event_facets(event), -1)
+    
     db.session.delete(event)
     db.session.commit()
+    catalog_cache.invalidate()
     
     return jsonify({'message': 'Event deleted successfully'}), 200
 
@@ -385,7 +487,7 @@ def create_review(event_id):
     
     # Rating validation
     rating = data.get('rating')
-    if not rating or not isinstance(rating, int) or rating < 1 or rating > 5:
+    if isinstance(rating, bool) or not isinstance(rating, int) or rating < 1 or rating > 5:
         return jsonify({'error': 'Rating must be between 1 and 5'}), 400
     
     review = Review(
@@ -396,7 +498,9 @@ def create_review(event_id):
     )
     
     db.session.add(review)
+    Event.record_rating(event_id, rating)
     db.session.commit()
+    catalog_cache.invalidate()
     
     return jsonify({
         'message': 'Review submitted successfully',
@@ -1,8 +1,14 @@
-from flask import Blueprint, request, jsonify
-from server.extensions import db
-from server.models import Order, OrderItem, TicketType, Ticket, EventRegistration, Payment
+from flask import Blueprint, request, jsonify, current_app
+from server.extensions import db, waiting_room
+from server.models import Order, OrderItem, TicketType
 from server.auth import token_required, role_required
-import uuid
+from server.utils.idempotency import idempotent
+from server.utils.order_history import order_history_page
+from server.utils.order_states import apply_transition, InvalidTransition, ConcurrentUpdate
+from server.utils.pagination import parse_limit, InvalidCursor
+from server.utils.inventory import reserve_cart, release_tickets, hold_expiry
+from server.utils.tickets import issue_tickets
+from server.utils.purchase_limits import record_purchase, release_purchases
 from datetime import datetime, timezone
 
 order_bp = Blueprint('orders', __name__, url_prefix='/api/orders')
@@ -10,31 +16,20 @@ order_bp = Blueprint('orders', __name__, url_prefix='/api/orders')
 @order_bp.route('', methods=['GET'])
 @token_required
 def get_user_orders():
-    user_id = request.current_user.id
-    
-    orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
-    
-    orders_data = []
-    for order in orders:
-        order_data = {
-            'id': order.id,
-            'reference': order.reference,
-            'event': {
-                'id': order.event.id,
-                'title': order.event.title,
-                'start_time': order.event.start_time.isoformat(),
-                'venue': order.event.venue,
-                'city': order.event.city
-            },
-            'total_amount': float(order.total_amount),
-            'payment_status': order.payment_status,
-            'order_status': order.order_status,
-            'created_at': order.created_at.isoformat(),
-            'ticket_count': len(order.tickets)
-        }
-        orders_data.append(order_data)
-    
-    return jsonify(orders_data), 200
+    cursor = request.args.get('cursor')
+    limit = parse_limit(request.args.get('limit'),
+                        current_app.config['EVENTS_PAGE_SIZE'],
+                        current_app.config['EVENTS_MAX_PAGE_SIZE'])
+    
+    try:
+        orders, next_cursor = order_history_page(request.current_user.id, cursor, limit)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    response = jsonify(orders)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 # GET single order details
 @order_bp.route('/<int:order_id>', methods=['GET'])
@@ -66,14 +61,12 @@ def get_order(order_id):
             'checked_in_at': ticket.checked_in_at.isoformat() if ticket.checked_in_at else None
         })
     
-    # Get payment info
-    payment_info = None
-    if order.payment:
-        payment_info = {
-            'provider': order.payment.provider,
-            'status': order.payment.status,
-            'created_at': order.payment.created_at.isoformat()
-        }
+    # Get payment info - every attempt, oldest first; 'payment' is the latest
+    payments = [{
+        'provider': payment.provider,
+        'status': payment.status,
+        'created_at': payment.created_at.isoformat()
+    } for payment in order.payments]
     
     return jsonify({
         'order': {
@@ -83,16 +76,19 @@ def get_order(order_id):
             'total_amount': float(order.total_amount),
             'payment_status': order.payment_status,
             'order_status': order.order_status,
+            'hold_expires_at': order.hold_expires_at.isoformat() if order.hold_expires_at else None,
             'created_at': order.created_at.isoformat()
         },
         'order_items': order_items,
         'tickets': tickets,
-        'payment': payment_info
+        'payment': payments[-1] if payments else None,
+        'payments': payments
     }), 200
 
 # POST - Create order from cart
 @order_bp.route('', methods=['POST'])
 @token_required
+@idempotent
 def create_order():
     data = request.get_json()
     
@@ -106,6 +102,7 @@ def create_order():
     total_amount = 0
     event_id = None
     order_items_data = []
+    reserved_quantities = {}
     
     for item in cart_items:
         ticket_type_id = item.get('ticket_type_id')
@@ -118,7 +115,7 @@ def create_order():
         if not ticket_type:
             return jsonify({'error': f'Ticket type {ticket_type_id} not found'}), 404
         
-        # Check availability
+        # Check availability (early rejection only - the reservation below is authoritative)
         if ticket_type.available_quantity < quantity:
             return jsonify({'error': f'Not enough tickets available for {ticket_type.name}'}), 400
         
@@ -142,6 +139,33 @@ def create_order():
             'unit_price': ticket_type.price,
             'subtotal': subtotal
         })
+        reserved_quantities[ticket_type.id] = reserved_quantities.get(ticket_type.id, 0) + quantity
+    
+    # High-demand on-sales only take orders from buyers admitted through the waiting room
+    queue_claim = None
+    if order_items_data[0]['ticket_type'].event.high_demand:
+        queue_claim, error = waiting_room.claim(data.get('purchase_token'), event_id, request.current_user.id)
+        if error:
+            return jsonify({'error': error, 'waiting_room': True}), 403
+    
+    # max_per_user counts the user's earlier orders too - one keyed upsert per ticket type
+    ticket_types = {item['ticket_type'].id: item['ticket_type'] for item in order_items_data}
+    for ticket_type_id in sorted(reserved_quantities):
+        ticket_type = ticket_types[ticket_type_id]
+        if not record_purchase(request.current_user.id, ticket_type_id,
+                               reserved_quantities[ticket_type_id], ticket_type.max_per_user):
+            db.session.rollback()
+            waiting_room.release(queue_claim)
+            return jsonify({'error': f'Maximum {ticket_type.max_per_user} tickets allowed per user for {ticket_type.name}'}), 400
+    
+    # Take the tickets with conditional decrements so concurrent buyers can never oversell
+    shard_counts = {ticket_type_id: tt.sales_shards for ticket_type_id, tt in ticket_types.items()}
+    sold_out = reserve_cart(reserved_quantities, shard_counts)
+    if sold_out is not None:
+        db.session.rollback()
+        waiting_room.release(queue_claim)
+        sold_out_name = next(i['ticket_type'].name for i in order_items_data if i['ticket_type'].id == sold_out)
+        return jsonify({'error': f'Not enough tickets available for {sold_out_name}'}), 409
     
     # Create order
     order = Order(
@@ -149,13 +173,14 @@ def create_order():
         event_id=event_id,
         total_amount=total_amount,
         payment_status='pending',
-        order_status='processing'
+        order_status='processing',
+        hold_expires_at=hold_expiry()
     )
     
     db.session.add(order)
     db.session.flush()  # Get order ID
     
-    # Create order items and update ticket quantities
+    # Create order items
     for item_data in order_items_data:
         order_item = OrderItem(
             order_id=order.id,
@@ -165,19 +190,9 @@ def create_order():
             subtotal=item_data['subtotal']
         )
         db.session.add(order_item)
-        
-        # Update sold quantity
-        item_data['ticket_type'].quantity_sold += item_data['quantity']
-        
-        # Create tickets
-        for i in range(item_data['quantity']):
-            ticket = Ticket(
-                order_id=order.id,
-                ticket_type_id=item_data['ticket_type'].id,
-                code=f"TKT-{uuid.uuid4().hex[:12].upper()}",
-                status='valid'
-            )
-            db.session.add(ticket)
+    
+    # Create tickets - a single multi-row insert however large the order
+    tickets = issue_tickets(order.id, [(item['ticket_type'].id, item['quantity']) for item in order_items_data])
     
     db.session.commit()
     
@@ -187,7 +202,9 @@ def create_order():
             'id': order.id,
             'reference': order.reference,
             'total_amount': float(total_amount),
-            'payment_required': True
+            'payment_required': True,
+            'hold_expires_at': order.hold_expires_at.isoformat(),
+            'ticket_codes': [ticket['code'] for ticket in tickets]
         }
     }), 201
 
@@ -212,13 +229,21 @@ def cancel_order(order_id):
     if order.event.start_time < datetime.now(timezone.utc):
         return jsonify({'error': 'Cannot cancel order for event that has already started'}), 400
     
-    # Update order status
-    order.order_status = 'cancelled'
-    order.updated_at = datetime.now(timezone.utc)
-    
-    # Restore ticket quantities
-    for item in order.order_items:
-        item.ticket_type.quantity_sold -= item.quantity
+    # Update order status - version-checked against concurrent payments and the hold sweeper
+    try:
+        apply_transition(order, 'cancel')
+    except InvalidTransition as e:
+        return jsonify({'error': str(e)}), 400
+    except ConcurrentUpdate:
+        return jsonify({'error': 'Order was changed by another request, please retry'}), 409
+    
+    # Restore ticket quantities and the user's purchase ledger, locking
+    # ticket types in id order like reserve_cart and the hold sweeper
+    items = sorted(order.order_items, key=lambda item: item.ticket_type_id)
+    for item in items:
+        release_tickets(item.ticket_type_id, item.quantity)
+    release_purchases([{'user_id': order.user_id, 'ticket_type_id': item.ticket_type_id, 'quantity': item.quantity}
+                       for item in items])
     
     # Mark tickets as cancelled
     for ticket in order.tickets:
@@ -1,13 +1,20 @@
+from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
-from server.extensions import db
-from server.models import Payment, Order, Notification
+from sqlalchemy.orm.exc import StaleDataError
+from server.extensions import db, mpesa_simulator
+from server.models import Payment, Order
 from server.auth import token_required, role_required
-from datetime import datetime, timezone
+from server.utils.idempotency import idempotent
+from server.utils.inventory import payment_hold_expiry
+from server.utils.order_states import can_transition
+from server.utils.payment_callbacks import enqueue_callback
+from server.utils.payment_payloads import store_payload
 
 payment_bp = Blueprint('payments', __name__, url_prefix='/api/payments')
 
 @payment_bp.route('', methods=['POST'])
 @token_required
+@idempotent
 def process_payment():
     data = request.get_json()
     
@@ -32,6 +39,12 @@ def process_payment():
     if order.payment_status == 'completed':
         return jsonify({'error': 'Order is already paid'}), 400
     
+    if order.order_status == 'cancelled':
+        return jsonify({'error': 'Order has been cancelled or its ticket hold expired'}), 400
+    
+    if not can_transition(order, 'pay'):
+        return jsonify({'error': 'Order cannot be paid in its current state'}), 400
+    
     if abs(float(amount) - float(order.total_amount)) > 0.01:
         return jsonify({'error': 'Payment amount does not match order total'}), 400
     
@@ -40,43 +53,49 @@ def process_payment():
     if existing_payment:
         return jsonify({'error': 'Payment with this reference already exists'}), 400
     
-    # Create payment record
+    # With the local simulator enabled, M-Pesa payments start a simulated STK
+    # push and use its CheckoutRequestID as the reference, as Daraja would
+    if provider == 'mpesa' and not provider_ref and mpesa_simulator.enabled:
+        push = mpesa_simulator.stk_push(amount, data.get('phone') or request.current_user.phone, order.reference)
+        provider_ref = push['CheckoutRequestID']
+    
+    # Create payment record - the order is marked paid when the provider's
+    # callback confirms it (see process_callback_batch)
     payment = Payment(
         order_id=order_id,
         provider=provider,
         provider_ref=provider_ref,
         amount=amount,
-        status='pending',
-        raw_payload=data
+        status='pending'
     )
     
     db.session.add(payment)
     
-    payment.status = 'success'
-    order.payment_status = 'completed'
-    order.order_status = 'confirmed'
-    
-    # Create success notification
-    notification = Notification(
-        user_id=order.user_id,
-        title='Payment Successful!',
-        message=f'Your payment of KES {amount} for order {order.reference} was successful.',
-        type='payment_success'
-    )
-    db.session.add(notification)
-    
+    # Confirmation is asynchronous, so hold the tickets until the callback has had
+    # time to arrive - otherwise the sweeper could cancel an order the buyer paid for
+    order.hold_expires_at = payment_hold_expiry()
+    order.updated_at = datetime.now(timezone.utc)
+    try:
+        db.session.flush()
+    except StaleDataError:
+        # The sweeper or another request changed the order since it was loaded
+        db.session.rollback()
+        return jsonify({'error': 'Order was changed by another request, please retry'}), 409
+    # The request body is kept for audits only, compressed in its own table
+    store_payload(payment.id, data)
     db.session.commit()
     
     return jsonify({
         'payment_id': payment.id,
+        'provider_ref': payment.provider_ref,
         'status': payment.status,
-        'message': 'Payment processed successfully',
+        'message': 'Payment initiated, awaiting confirmation from the provider',
         'order': {
             'id': order.id,
             'reference': order.reference,
             'payment_status': order.payment_status
         }
-    }), 200
+    }), 202
 
 @payment_bp.route('/<int:id>', methods=['GET'])
 @token_required
@@ -126,6 +145,9 @@ def get_order_payments(order_id):
 
 @payment_bp.route('/callback/<provider>', methods=['POST'])
 def payment_callback(provider):
-    data = request.get_json() or request.form.to_dict()
-
+    data = request.get_json(silent=True) or request.form.to_dict()
+    
+    # Just store it - workers match and apply callbacks off the request path
+    enqueue_callback(provider, data)
+    
     return jsonify({'status': 'received'}), 200
\ No newline at end of file
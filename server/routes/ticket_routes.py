@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from server.extensions import db
 from server.models import Ticket, Event, Order, User
 from server.auth import token_required, role_required
+from server.utils.scanner import build_manifest, scanner_key, sync_check_ins, HASH_LENGTH, MAX_SYNC_SCANS
 from datetime import datetime, timezone
 import qrcode
 from io import BytesIO
@@ -174,4 +175,60 @@ def verify_ticket(code):
         'ticket_type': ticket.ticket_type.name,
         'checked_in': ticket.checked_in_at is not None,
         'checked_in_at': ticket.checked_in_at.isoformat() if ticket.checked_in_at else None
-    }), 200
\ No newline at end of file
+    }), 200
+
+def _gate_event(event_id):
+    # Scanner endpoints are for the event's organizer (and admins)
+    event = Event.query.get_or_404(event_id)
+    if event.organizer_id != request.current_user.id and request.current_user.role.name != 'admin':
+        return None
+    return event
+
+@ticket_bp.route('/events/<int:event_id>/manifest', methods=['GET'])
+@token_required
+def get_scanner_manifest(event_id):
+    if _gate_event(event_id) is None:
+        return jsonify({'error': 'Only event organizer can download the ticket manifest'}), 403
+    
+    manifest = build_manifest(event_id)
+    response = current_app.response_class(manifest, mimetype='application/octet-stream')
+    response.headers['Content-Disposition'] = f'attachment; filename=event-{event_id}.manifest'
+    return response
+
+@ticket_bp.route('/events/<int:event_id>/scanner-key', methods=['GET'])
+@token_required
+def get_scanner_key(event_id):
+    if _gate_event(event_id) is None:
+        return jsonify({'error': 'Only event organizer can provision scanners'}), 403
+    
+    return jsonify({
+        'event_id': event_id,
+        'key': scanner_key(event_id).hex(),
+        'hash_length': HASH_LENGTH
+    }), 200
+
+@ticket_bp.route('/events/<int:event_id>/check-ins', methods=['POST'])
+@token_required
+def sync_offline_check_ins(event_id):
+    if _gate_event(event_id) is None:
+        return jsonify({'error': 'Only event organizer can check in tickets'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    scans = data.get('scans')
+    if not isinstance(scans, list):
+        return jsonify({'error': 'scans must be a list of {code, scanned_at}'}), 400
+    if len(scans) > MAX_SYNC_SCANS:
+        return jsonify({'error': f'At most {MAX_SYNC_SCANS} scans per sync'}), 400
+    
+    results = sync_check_ins(event_id, scans)
+    
+    counts = {}
+    for result in results:
+        counts[result['result']] = counts.get(result['result'], 0) + 1
+    
+    return jsonify({
+        'checked_in': counts.get('checked_in', 0),
+        'already_checked_in': counts.get('already_checked_in', 0),
+        'rejected': counts.get('rejected', 0),
+        'results': results
+    }), 200
@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from server.extensions import db
 from server.models import User, Role, Notification, Event, Order, Review, Wishlist
 from server.auth import token_required, role_required
+from server.utils.event_listing import event_list_query, serialize_event_row
+from server.utils.order_history import order_history_page
+from server.utils.pagination import parse_limit, InvalidCursor
 import re
 
 user_bp = Blueprint('users', __name__, url_prefix='/api/users')
@@ -111,8 +114,8 @@ def get_user_events(user_id):
     if request.current_user.id != user_id and request.current_user.role.name != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
-    events = Event.query.filter_by(organizer_id=user_id).all()
-    return jsonify([event.to_dict() for event in events]), 200
+    events = event_list_query().filter(Event.organizer_id == user_id).order_by(Event.start_time.desc()).all()
+    return jsonify([serialize_event_row(event) for event in events]), 200
 
 @user_bp.route('/<int:user_id>/orders', methods=['GET'])
 @token_required
@@ -120,26 +123,20 @@ def get_user_orders(user_id):
     if request.current_user.id != user_id and request.current_user.role.name != 'admin':
         return jsonify({'error': 'Unauthorized'}), 403
     
-    orders = Order.query.filter_by(user_id=user_id).all()
-    
-    orders_data = []
-    for order in orders:
-        order_data = {
-            'id': order.id,
-            'reference': order.reference,
-            'total_amount': float(order.total_amount),
-            'payment_status': order.payment_status,
-            'order_status': order.order_status,
-            'created_at': order.created_at.isoformat(),
-            'event': {
-                'id': order.event.id,
-                'title': order.event.title,
-                'start_time': order.event.start_time.isoformat()
-            }
-        }
-        orders_data.append(order_data)
-    
-    return jsonify(orders_data), 200
+    cursor = request.args.get('cursor')
+    limit = parse_limit(request.args.get('limit'),
+                        current_app.config['EVENTS_PAGE_SIZE'],
+                        current_app.config['EVENTS_MAX_PAGE_SIZE'])
+    
+    try:
+        orders, next_cursor = order_history_page(user_id, cursor, limit)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    response = jsonify(orders)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 @user_bp.route('/<int:user_id>/wishlist', methods=['GET'])
 @token_required
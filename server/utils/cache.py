@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class LocalBackend:
+    """In-process stand-in for the shared (Redis) backend.
+
+    Implements the same small get/set/add/incr/delete surface so local runs and
+    tests behave like production, but it is only shared between threads of one
+    process - with several workers each has its own copy.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        # Drop expired entries first, then the oldest expiring ones. Keys
+        # without a TTL (counters such as the catalog version) are kept.
+        now = time.time()
+        for key in [k for k, (_, exp) in self._data.items() if exp is not None and exp < now]:
+            del self._data[key]
+        expiring = [k for k, (_, exp) in self._data.items() if exp is not None]
+        for key in expiring[:max(0, len(self._data) - self.maxsize)]:
+            del self._data[key]
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            if len(self._data) > self.maxsize:
+                self._prune()
+
+    def add(self, key, value, ttl=None):
+        """Set key only if it does not exist yet. Returns True if it was set"""
+        with self._lock:
+            if self._live(key):
+                return False
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            if len(self._data) > self.maxsize:
+                self._prune()
+            return True
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            entry = self._live(key)
+            value, expires_at = entry if entry else (0, None)
+            value = int(value) + amount
+            self._data[key] = (value, expires_at)
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    """Shared backend on Redis, values are stored as JSON"""
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed when CACHE_REDIS_URL is set
+
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, json.dumps(value), ex=ttl)
+
+    def add(self, key, value, ttl=None):
+        return bool(self._client.set(key, json.dumps(value), ex=ttl, nx=True))
+
+    def incr(self, key, amount=1):
+        return self._client.incrby(key, amount)
+
+    def delete(self, key):
+        self._client.delete(key)
+
+
+class CatalogCache:
+    """Two-tier response cache for the public event catalog.
+
+    Keys embed a catalog version number kept in the shared backend. Writers
+    bump the version instead of hunting down individual keys, so every worker
+    stops serving old entries on its next lookup; stale entries simply age out
+    of the LRU.
+    """
+
+    VERSION_KEY = 'catalog:version'
+
+    def __init__(self, app=None):
+        self.local = TTLCache()
+        self.backend = LocalBackend()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.local = TTLCache(maxsize=app.config.get('CATALOG_CACHE_SIZE', 1024),
+                              ttl=app.config.get('CATALOG_CACHE_TTL', 60))
+        redis_url = app.config.get('CACHE_REDIS_URL')
+        self.backend = RedisBackend(redis_url) if redis_url else LocalBackend()
+        app.extensions['catalog_cache'] = self
+
+    def version(self):
+        return int(self.backend.get(self.VERSION_KEY) or 0)
+
+    def invalidate(self):
+        """Invalidate every catalog entry - call after any write that changes a listing or event"""
+        self.local.clear()
+        return self.backend.incr(self.VERSION_KEY)
+
+    def make_key(self, namespace, params):
+        normalized = sorted((k, str(v)) for k, v in params.items() if v is not None and v != '')
+        return f"catalog:{self.version()}:{namespace}:{json.dumps(normalized, separators=(',', ':'))}"
+
+    def get(self, key, ttl=None):
+        value = self.local.get(key)
+        if value is None:
+            value = self.backend.get(key)
+            if value is not None:
+                self.local.set(key, value, ttl)
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.local.ttl
+        self.local.set(key, value, ttl)
+        self.backend.set(key, value, ttl)
@@ -0,0 +1,56 @@
+from server.extensions import db
+from server.models import Event, User
+
+
+def event_list_query():
+    """Query selecting only the columns list views render, organizer name joined in.
+
+    Rows come back as plain SQLAlchemy Row tuples - no ORM identity map,
+    no change tracking and no lazy loads per row.
+    """
+    return db.session.query(
+        Event.id,
+        Event.title,
+        Event.description,
+        Event.venue,
+        Event.city,
+        Event.country,
+        Event.start_time,
+        Event.end_time,
+        Event.category,
+        Event.status,
+        Event.organizer_id,
+        User.username.label('organizer_name'),
+        Event.poster_url,
+        Event.banner_url,
+        Event.capacity,
+        Event.high_demand,
+        Event.rating_count,
+        Event.rating_sum,
+        Event.created_at,
+    ).join(User, Event.organizer_id == User.id)
+
+
+def serialize_event_row(row):
+    """List-view counterpart of Event.to_dict() for rows from event_list_query()"""
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'venue': row.venue,
+        'city': row.city,
+        'country': row.country,
+        'start_time': row.start_time.isoformat(),
+        'end_time': row.end_time.isoformat(),
+        'category': row.category,
+        'status': row.status,
+        'organizer_id': row.organizer_id,
+        'organizer_name': row.organizer_name,
+        'poster_url': row.poster_url,
+        'banner_url': row.banner_url,
+        'capacity': row.capacity,
+        'high_demand': row.high_demand,
+        'average_rating': round(row.rating_sum / row.rating_count, 1) if row.rating_count else 0,
+        'review_count': row.rating_count or 0,
+        'created_at': row.created_at.isoformat()
+    }
@@ -0,0 +1,77 @@
+from collections import Counter
+from server.extensions import db
+from server.models import Event, EventFacetCount
+
+FACET_DIMENSIONS = ('category', 'city', 'month')
+
+
+def facet_values(category, city, start_time):
+    """The (dimension, value) pairs an approved event is counted under"""
+    values = []
+    if category:
+        values.append(('category', category))
+    if city:
+        values.append(('city', city))
+    if start_time:
+        values.append(('month', start_time.strftime('%Y-%m')))
+    return values
+
+
+def event_facets(event):
+    return facet_values(event.category, event.city, event.start_time)
+
+
+def apply_facet_delta(values, delta):
+    """Atomically add delta to each facet count, creating missing rows"""
+    if not values or not delta:
+        return
+
+    rows = [{'dimension': d, 'value': v, 'count': delta} for d, v in values]
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(EventFacetCount).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EventFacetCount.dimension, EventFacetCount.value],
+            set_={'count': EventFacetCount.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt)
+        return
+
+    for row in rows:
+        updated = db.session.execute(
+            db.update(EventFacetCount)
+            .where(EventFacetCount.dimension == row['dimension'], EventFacetCount.value == row['value'])
+            .values(count=EventFacetCount.count + delta)
+        ).rowcount
+        if not updated:
+            db.session.add(EventFacetCount(**row))
+
+
+def get_facets():
+    """All non-empty facet counts grouped by dimension, largest first"""
+    rows = EventFacetCount.query.filter(EventFacetCount.count > 0) \
+        .order_by(EventFacetCount.dimension, EventFacetCount.count.desc(), EventFacetCount.value).all()
+
+    facets = {dimension: [] for dimension in FACET_DIMENSIONS}
+    for row in rows:
+        facets.setdefault(row.dimension, []).append({'value': row.value, 'count': row.count})
+    return facets
+
+
+def rebuild_facets():
+    """Recount every facet from the approved events"""
+    counts = Counter()
+    query = db.session.query(Event.category, Event.city, Event.start_time) \
+        .filter(Event.status == 'approved').execution_options(yield_per=1000)
+    for category, city, start_time in query:
+        counts.update(facet_values(category, city, start_time))
+
+    EventFacetCount.query.delete()
+    db.session.add_all(EventFacetCount(dimension=d, value=v, count=c) for (d, v), c in counts.items())
+    db.session.commit()
+    return len(counts)
@@ -0,0 +1,24 @@
+import hashlib
+from flask import request, make_response
+
+
+def weak_etag(*parts):
+    """Build an opaque weak ETag value from the things a response depends on"""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return digest[:20]
+
+
+def not_modified(etag):
+    """Return a 304 response if the client's If-None-Match matches etag, else None"""
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate, 304 keeps it cheap
+    return response
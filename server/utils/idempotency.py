@@ -0,0 +1,152 @@
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import request, jsonify, current_app
+from sqlalchemy.exc import IntegrityError
+from server.extensions import db
+from server.models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+
+def _digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else str(part).encode())
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def _claim(key, request_hash):
+    """Try to become the one execution for key. Returns True if this request should run"""
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+
+    db.session.add(IdempotencyKey(key=key, request_hash=request_hash, status='in_progress',
+                                  locked_at=now, expires_at=expires_at))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+
+    # Take over keys that have expired, or whose execution died without finishing
+    abandoned = now - timedelta(seconds=current_app.config['IDEMPOTENCY_LOCK_TIMEOUT'])
+    result = db.session.execute(
+        db.update(IdempotencyKey)
+        .where(IdempotencyKey.key == key, db.or_(
+            IdempotencyKey.expires_at < now,
+            db.and_(IdempotencyKey.status == 'in_progress', IdempotencyKey.locked_at < abandoned,
+                    IdempotencyKey.request_hash == request_hash)
+        ))
+        .values(request_hash=request_hash, status='in_progress', response_code=None, response_body=None,
+                locked_at=now, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _stored(key):
+    row = db.session.execute(
+        db.select(IdempotencyKey.request_hash, IdempotencyKey.status,
+                  IdempotencyKey.response_code, IdempotencyKey.response_body)
+        .where(IdempotencyKey.key == key)
+    ).first()
+    db.session.rollback()  # don't hold a connection while waiting
+    return row
+
+
+def _replay(row):
+    response = current_app.response_class(row.response_body, status=row.response_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _finish(key, response):
+    if 200 <= response.status_code < 300:
+        db.session.execute(
+            db.update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status='done', response_code=response.status_code,
+                    response_body=response.get_data(as_text=True))
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Failed requests changed nothing, so a retry may run them again
+        _release(key)
+    db.session.commit()
+
+
+def _release(key):
+    db.session.rollback()
+    db.session.execute(db.delete(IdempotencyKey).where(IdempotencyKey.key == key))
+    db.session.commit()
+
+
+def idempotent(f):
+    """Make a POST handler safe to retry with an Idempotency-Key header.
+
+    Goes under @token_required. The first request with a key runs the
+    handler; its successful response is stored and replayed to any retry
+    with the same key and body until IDEMPOTENCY_KEY_TTL runs out. Retries
+    arriving while it is still running wait for it and replay its response
+    instead of running the handler a second time. Error responses are not
+    stored, so a failed request can simply be retried.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        header = request.headers.get('Idempotency-Key')
+        if not header:
+            return f(*args, **kwargs)
+        if len(header) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        key = _digest(request.current_user.id, request.method, request.path, header)
+        request_hash = _digest(request.get_data())
+
+        deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_TIMEOUT']
+        delay = 0.05
+        while not _claim(key, request_hash):
+            row = _stored(key)
+            if row is None:
+                continue  # released in the meantime - try again
+            if row.request_hash != request_hash:
+                return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+            if row.status == 'done':
+                return _replay(row)
+
+            # Another execution with this key is in flight - wait for its result
+            if time.monotonic() > deadline:
+                response = jsonify({'error': 'A request with this Idempotency-Key is still being processed'})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            _release(key)
+            raise
+        _finish(key, response)
+        return response
+
+    return decorated
+
+
+def purge_expired_keys(batch_size=1000):
+    """Delete expired idempotency keys batch by batch. Returns how many were deleted"""
+    total = 0
+    while True:
+        expired = db.select(IdempotencyKey.key).where(IdempotencyKey.expires_at < datetime.now(timezone.utc)) \
+            .limit(batch_size).scalar_subquery()
+        result = db.session.execute(
+            db.delete(IdempotencyKey).where(IdempotencyKey.key.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
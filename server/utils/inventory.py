@@ -0,0 +1,233 @@
+import random
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from server.extensions import db
+from server.models import Order, OrderItem, Ticket, TicketType, TicketTypeShard
+from server.utils.order_states import TRANSITIONS, transition_filter
+from server.utils.purchase_limits import release_purchases
+
+
+def reserve_tickets(ticket_type_id, quantity, shards=0):
+    """Atomically take quantity tickets from a ticket type.
+
+    A single conditional UPDATE - the row lock it takes is held only for the
+    statement, and the WHERE clause guarantees quantity_sold never passes
+    quantity_total however many buyers race. Sharded ticket types (shards > 0)
+    take from their shard rows instead. Returns False if not enough are left.
+    """
+    if shards:
+        return _reserve_sharded(ticket_type_id, quantity, shards)
+
+    sold = db.func.coalesce(TicketType.quantity_sold, 0)
+    result = db.session.execute(
+        db.update(TicketType)
+        # A type sharded since the caller looked must not be sold from quantity_sold
+        .where(TicketType.id == ticket_type_id, TicketType.sales_shards == 0,
+               sold + quantity <= TicketType.quantity_total)
+        .values(quantity_sold=sold + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _take_from_shard(ticket_type_id, shard, quantity):
+    result = db.session.execute(
+        db.update(TicketTypeShard)
+        .where(TicketTypeShard.ticket_type_id == ticket_type_id, TicketTypeShard.shard == shard,
+               TicketTypeShard.sold + quantity <= TicketTypeShard.allotted)
+        .values(sold=TicketTypeShard.sold + quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _locked_shards(ticket_type_id):
+    return db.session.execute(
+        db.select(TicketTypeShard.shard, TicketTypeShard.allotted, TicketTypeShard.sold)
+        .where(TicketTypeShard.ticket_type_id == ticket_type_id)
+        .order_by(TicketTypeShard.shard)
+        .with_for_update()
+    ).all()
+
+
+def _reserve_sharded(ticket_type_id, quantity, shards):
+    # Fast path: the whole quantity from one randomly picked shard, so
+    # concurrent buyers mostly lock different rows
+    if _take_from_shard(ticket_type_id, random.randrange(shards), quantity):
+        return True
+
+    # That shard is (nearly) empty - spread the quantity over all of them,
+    # locking the shard rows in order
+    rows = _locked_shards(ticket_type_id)
+    if sum(row.allotted - row.sold for row in rows) < quantity:
+        return False
+
+    remaining = quantity
+    for row in rows:
+        take = min(remaining, row.allotted - row.sold)
+        if take > 0:
+            if not _take_from_shard(ticket_type_id, row.shard, take):
+                return False
+            remaining -= take
+        if not remaining:
+            break
+    return True
+
+
+def release_tickets(ticket_type_id, quantity):
+    """Atomically give quantity tickets back to a ticket type"""
+    rows = _locked_shards(ticket_type_id)
+    if rows:
+        remaining = quantity
+        for row in rows:
+            give = min(remaining, row.sold)
+            if give > 0:
+                db.session.execute(
+                    db.update(TicketTypeShard)
+                    .where(TicketTypeShard.ticket_type_id == ticket_type_id, TicketTypeShard.shard == row.shard)
+                    .values(sold=TicketTypeShard.sold - give)
+                    .execution_options(synchronize_session=False)
+                )
+                remaining -= give
+        if not remaining:
+            return
+        # The rest were sold before the type was sharded - move them into
+        # the first shard's allotment so they can be sold again
+        db.session.execute(
+            db.update(TicketTypeShard)
+            .where(TicketTypeShard.ticket_type_id == ticket_type_id, TicketTypeShard.shard == rows[0].shard)
+            .values(allotted=TicketTypeShard.allotted + remaining)
+            .execution_options(synchronize_session=False)
+        )
+        quantity = remaining
+
+    sold = db.func.coalesce(TicketType.quantity_sold, 0)
+    db.session.execute(
+        db.update(TicketType)
+        .where(TicketType.id == ticket_type_id)
+        .values(quantity_sold=db.case((sold >= quantity, sold - quantity), else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reserve_cart(quantities, shards=None):
+    """Reserve every {ticket_type_id: quantity} in the cart, or none of them.
+
+    shards maps sharded ticket type ids to their shard count. Rows are always
+    locked in ticket_type_id order so two carts touching the same ticket
+    types cannot deadlock. Returns the id of the first ticket type that ran
+    out, or None on success; the caller must roll back on failure.
+    """
+    shards = shards or {}
+    for ticket_type_id in sorted(quantities):
+        if not reserve_tickets(ticket_type_id, quantities[ticket_type_id], shards.get(ticket_type_id, 0)):
+            return ticket_type_id
+    return None
+
+
+def set_sales_shards(ticket_type_id, shards):
+    """Switch a ticket type to shards sub-counters, or back to a single counter with 0.
+
+    Sales so far are folded into quantity_sold and what is left of
+    quantity_total is split evenly over the new shards. The caller commits.
+    """
+    ticket_type = db.session.get(TicketType, ticket_type_id, with_for_update=True)
+    if ticket_type is None:
+        return None
+
+    rows = _locked_shards(ticket_type_id)
+    ticket_type.quantity_sold = (ticket_type.quantity_sold or 0) + sum(row.sold for row in rows)
+    db.session.execute(db.delete(TicketTypeShard).where(TicketTypeShard.ticket_type_id == ticket_type_id))
+
+    remaining = max(0, ticket_type.quantity_total - ticket_type.quantity_sold)
+    if shards:
+        db.session.execute(db.insert(TicketTypeShard), [{
+            'ticket_type_id': ticket_type_id,
+            'shard': shard,
+            'allotted': remaining // shards + (1 if shard < remaining % shards else 0),
+            'sold': 0
+        } for shard in range(shards)])
+    ticket_type.sales_shards = shards
+    db.session.expire(ticket_type, ['shards'])
+    return ticket_type
+
+
+def hold_expiry():
+    """When a hold taken now runs out"""
+    return datetime.now(timezone.utc) + timedelta(seconds=current_app.config['ORDER_HOLD_TTL'])
+
+
+def payment_hold_expiry():
+    """When the hold on an order whose payment was started now runs out"""
+    return datetime.now(timezone.utc) + timedelta(seconds=current_app.config['PAYMENT_HOLD_TTL'])
+
+
+def release_expired_holds(batch_size):
+    """Cancel up to batch_size unpaid orders whose hold has expired and give their tickets back.
+
+    Set-based: one SELECT picks the batch, then one UPDATE each for orders and
+    tickets, one per distinct ticket type and one executemany for the users'
+    purchase ledgers, whatever the batch size. On
+    Postgres the batch is locked with SKIP LOCKED, so several sweepers can run
+    side by side. Returns the number of orders released.
+    """
+    now = datetime.now(timezone.utc)
+    expirable = transition_filter('expire')
+
+    order_ids = db.session.scalars(
+        db.select(Order.id)
+        .where(expirable, Order.hold_expires_at < now)
+        .order_by(Order.hold_expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not order_ids:
+        db.session.rollback()
+        return 0
+
+    # Re-checked in the UPDATE, and the version bumped, so a payment that got
+    # in first (or extended the hold) wins and one still in flight gets a version conflict
+    order_ids = db.session.scalars(
+        db.update(Order)
+        .where(Order.id.in_(order_ids), expirable, Order.hold_expires_at < now)
+        .values(order_status=TRANSITIONS['expire'].order_status, hold_expires_at=None,
+                updated_at=now, version=Order.version + 1)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not order_ids:
+        db.session.rollback()
+        return 0
+
+    purchases = db.session.execute(
+        db.select(Order.user_id, OrderItem.ticket_type_id, db.func.sum(OrderItem.quantity).label('quantity'))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(Order.user_id, OrderItem.ticket_type_id)
+    ).all()
+    released = {}
+    for row in purchases:
+        released[row.ticket_type_id] = released.get(row.ticket_type_id, 0) + int(row.quantity)
+
+    db.session.execute(
+        db.update(Ticket)
+        .where(Ticket.order_id.in_(order_ids), Ticket.status == 'valid')
+        .values(status='cancelled')
+        .execution_options(synchronize_session=False)
+    )
+    for ticket_type_id in sorted(released):
+        release_tickets(ticket_type_id, released[ticket_type_id])
+    release_purchases([row._asdict() for row in purchases])
+
+    db.session.commit()
+    return len(order_ids)
+
+
+def sweep_expired_holds(batch_size):
+    """Release expired holds batch by batch until none are left. Returns the total released"""
+    total = 0
+    while True:
+        count = release_expired_holds(batch_size)
+        total += count
+        if count < batch_size:
+            return total
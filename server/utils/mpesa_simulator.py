@@ -0,0 +1,128 @@
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime
+
+
+class MpesaSimulator:
+    """Local stand-in for the M-Pesa (Daraja) STK push, for development and load tests.
+
+    stk_push() answers like Daraja's processrequest endpoint and schedules the
+    result callback the customer's phone would eventually produce: after a
+    random delay between min_latency and max_latency seconds, failing with
+    failure_rate probability and delivered twice with duplicate_rate
+    probability. Callbacks are POSTed to callback_url when set, otherwise
+    sent through the app's own /api/payments/callback/mpesa route in-process.
+    One delivery thread serves every pending callback.
+    """
+
+    # Daraja result codes the simulator picks from
+    SUCCESS = (0, 'The service request is processed successfully.')
+    FAILURES = [
+        (1032, 'Request cancelled by user'),
+        (1037, 'DS timeout user cannot be reached'),
+        (2001, 'The initiator information is invalid.'),
+    ]
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.min_latency = 1.0
+        self.max_latency = 5.0
+        self.failure_rate = 0.0
+        self.duplicate_rate = 0.0
+        self.callback_url = None
+        self.app = None
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('MPESA_SIMULATOR', False)
+        self.min_latency = app.config.get('MPESA_SIM_MIN_LATENCY', 1.0)
+        self.max_latency = max(self.min_latency, app.config.get('MPESA_SIM_MAX_LATENCY', 5.0))
+        self.failure_rate = app.config.get('MPESA_SIM_FAILURE_RATE', 0.0)
+        self.duplicate_rate = app.config.get('MPESA_SIM_DUPLICATE_RATE', 0.0)
+        self.callback_url = app.config.get('MPESA_CALLBACK_URL')
+        self.app = app
+        app.extensions['mpesa_simulator'] = self
+
+    def stk_push(self, amount, phone, account_reference):
+        """Start a simulated STK push. Returns Daraja's synchronous response body"""
+        checkout_request_id = f'ws_CO_{datetime.now():%d%m%Y%H%M%S}{uuid.uuid4().hex[:12]}'
+        merchant_request_id = f'{random.randint(10000, 99999)}-{uuid.uuid4().int % 10**8}-1'
+
+        payload = self._result(merchant_request_id, checkout_request_id, amount, phone)
+        due = time.monotonic() + random.uniform(self.min_latency, self.max_latency)
+        self._schedule(due, payload)
+        if random.random() < self.duplicate_rate:
+            # Daraja retries callbacks it thinks were not acknowledged
+            self._schedule(due + random.uniform(0, self.max_latency), payload)
+
+        return {
+            'MerchantRequestID': merchant_request_id,
+            'CheckoutRequestID': checkout_request_id,
+            'ResponseCode': '0',
+            'ResponseDescription': 'Success. Request accepted for processing',
+            'CustomerMessage': 'Success. Request accepted for processing',
+            'AccountReference': account_reference,
+        }
+
+    def _result(self, merchant_request_id, checkout_request_id, amount, phone):
+        failed = random.random() < self.failure_rate
+        code, description = random.choice(self.FAILURES) if failed else self.SUCCESS
+        callback = {
+            'MerchantRequestID': merchant_request_id,
+            'CheckoutRequestID': checkout_request_id,
+            'ResultCode': code,
+            'ResultDesc': description,
+        }
+        if not failed:
+            callback['CallbackMetadata'] = {'Item': [
+                {'Name': 'Amount', 'Value': float(amount)},
+                {'Name': 'MpesaReceiptNumber', 'Value': uuid.uuid4().hex[:10].upper()},
+                {'Name': 'TransactionDate', 'Value': int(f'{datetime.now():%Y%m%d%H%M%S}')},
+                {'Name': 'PhoneNumber', 'Value': phone},
+            ]}
+        return {'Body': {'stkCallback': callback}}
+
+    def _schedule(self, due, payload):
+        with self._condition:
+            heapq.heappush(self._queue, (due, next(self._sequence), payload))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._deliver_loop, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def pending(self):
+        """Number of callbacks not delivered yet"""
+        with self._condition:
+            return len(self._queue)
+
+    def _deliver_loop(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._condition.wait(timeout)
+                _, _, payload = heapq.heappop(self._queue)
+            try:
+                self._deliver(payload)
+            except Exception as e:
+                # A real provider just gives up on a callback URL that errors
+                self.app.logger.warning(f'Simulated M-Pesa callback failed: {e}')
+
+    def _deliver(self, payload):
+        if self.callback_url:
+            request = urllib.request.Request(self.callback_url, data=json.dumps(payload).encode(),
+                                             headers={'Content-Type': 'application/json'})
+            urllib.request.urlopen(request, timeout=10).close()
+        else:
+            self.app.test_client().post('/api/payments/callback/mpesa', json=payload)
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from server.extensions import db
+from server.models import Event, Order, User
+
+EXPORT_COLUMNS = [
+    'id', 'reference', 'created_at', 'payment_status', 'order_status', 'total_amount',
+    'user_id', 'username', 'email', 'event_id', 'event_title'
+]
+
+
+def order_export_query(start=None, end=None, payment_status=None, order_status=None):
+    """Core SELECT of every order with its user and event joined in, oldest first"""
+    query = db.select(
+        Order.id,
+        Order.reference,
+        Order.created_at,
+        Order.payment_status,
+        Order.order_status,
+        Order.total_amount,
+        User.id.label('user_id'),
+        User.username,
+        User.email,
+        Event.id.label('event_id'),
+        Event.title.label('event_title')
+    ).join(User, User.id == Order.user_id) \
+        .join(Event, Event.id == Order.event_id) \
+        .order_by(Order.id)
+
+    if start:
+        query = query.where(Order.created_at >= start)
+    if end:
+        query = query.where(Order.created_at < end)
+    if payment_status:
+        query = query.where(Order.payment_status == payment_status)
+    if order_status:
+        query = query.where(Order.order_status == order_status)
+    return query
+
+
+def _export_row(row):
+    return {
+        'id': row.id,
+        'reference': row.reference,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'payment_status': row.payment_status,
+        'order_status': row.order_status,
+        'total_amount': float(row.total_amount),
+        'user_id': row.user_id,
+        'username': row.username,
+        'email': row.email,
+        'event_id': row.event_id,
+        'event_title': row.event_title
+    }
+
+
+def stream_order_export(query, fmt='csv', batch_size=1000):
+    """Yield the export as text chunks of batch_size rows.
+
+    yield_per streams the result through a server-side cursor on Postgres,
+    so only one batch of rows is ever held in memory whatever the size of
+    the export.
+    """
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        yield buffer.getvalue()
+        for partition in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(_export_row(row) for row in partition)
+            yield buffer.getvalue()
+    else:
+        for partition in result.partitions():
+            yield ''.join(json.dumps(_export_row(row)) + '\n' for row in partition)
@@ -0,0 +1,58 @@
+from server.extensions import db
+from server.models import Event, Order, Ticket
+from server.utils.pagination import keyset_paginate
+
+
+def order_history_page(user_id, cursor=None, limit=20):
+    """One page of a user's orders, newest first, as (orders, next_cursor).
+
+    A single query: event fields are joined in and ticket counts come from
+    a subquery grouped over just this user's tickets, so neither the events
+    nor the tickets are loaded per order.
+    """
+    ticket_counts = db.session.query(
+        Ticket.order_id,
+        db.func.count(Ticket.id).label('ticket_count')
+    ).join(Order, Order.id == Ticket.order_id) \
+        .filter(Order.user_id == user_id) \
+        .group_by(Ticket.order_id) \
+        .subquery()
+
+    query = db.session.query(
+        Order.id,
+        Order.reference,
+        Order.total_amount,
+        Order.payment_status,
+        Order.order_status,
+        Order.created_at,
+        Event.id.label('event_id'),
+        Event.title.label('event_title'),
+        Event.start_time.label('event_start_time'),
+        Event.venue.label('event_venue'),
+        Event.city.label('event_city'),
+        db.func.coalesce(ticket_counts.c.ticket_count, 0).label('ticket_count')
+    ).join(Event, Event.id == Order.event_id) \
+        .outerjoin(ticket_counts, ticket_counts.c.order_id == Order.id) \
+        .filter(Order.user_id == user_id)
+
+    # Newest first - served by ix_orders_user_id_created_at
+    rows, next_cursor = keyset_paginate(query, [(Order.created_at, True), (Order.id, True)], cursor, limit)
+
+    orders = [{
+        'id': row.id,
+        'reference': row.reference,
+        'event': {
+            'id': row.event_id,
+            'title': row.event_title,
+            'start_time': row.event_start_time.isoformat(),
+            'venue': row.event_venue,
+            'city': row.event_city
+        },
+        'total_amount': float(row.total_amount),
+        'payment_status': row.payment_status,
+        'order_status': row.order_status,
+        'created_at': row.created_at.isoformat(),
+        'ticket_count': row.ticket_count
+    } for row in rows]
+
+    return orders, next_cursor
@@ -0,0 +1,66 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+from sqlalchemy.orm.exc import StaleDataError
+from server.extensions import db
+
+# A transition is legal from any of the listed (order_status, payment_status)
+# combinations; None in the target leaves that status unchanged.
+Transition = namedtuple('Transition', 'from_order from_payment order_status payment_status')
+
+TRANSITIONS = {
+    'pay': Transition({'processing'}, {'pending', 'failed'}, 'confirmed', 'completed'),
+    'fail_payment': Transition({'processing'}, {'pending', 'failed'}, None, 'failed'),
+    'cancel': Transition({'processing'}, {'pending', 'failed'}, 'cancelled', None),
+    'expire': Transition({'processing'}, {'pending', 'failed'}, 'cancelled', None),  # hold sweeper
+    'refund': Transition({'confirmed'}, {'completed'}, 'cancelled', 'refunded'),
+}
+
+
+class InvalidTransition(ValueError):
+    """The order is not in a state the transition can start from"""
+
+
+class ConcurrentUpdate(Exception):
+    """Another request changed the order since it was loaded"""
+
+
+def can_transition(order, name):
+    transition = TRANSITIONS[name]
+    return order.order_status in transition.from_order and order.payment_status in transition.from_payment
+
+
+def transition_filter(name):
+    """SQL condition matching the orders a transition may be applied to, for set-based updates"""
+    from server.models import Order
+
+    transition = TRANSITIONS[name]
+    return db.and_(Order.order_status.in_(transition.from_order),
+                   Order.payment_status.in_(transition.from_payment))
+
+
+def apply_transition(order, name):
+    """Move an order through a named transition and flush it.
+
+    The flush is checked against Order.version, so if another request
+    changed the order after it was loaded ConcurrentUpdate is raised -
+    routes turn that into a 409, and the caller (or request teardown) rolls
+    back. Once this returns, the row is written and the rest of the
+    transaction can rely on it.
+    """
+    if not can_transition(order, name):
+        raise InvalidTransition(f"Cannot {name.replace('_', ' ')} an order that is "
+                                f"{order.order_status} with payment {order.payment_status}")
+
+    transition = TRANSITIONS[name]
+    if transition.order_status:
+        order.order_status = transition.order_status
+    if transition.payment_status:
+        order.payment_status = transition.payment_status
+    if order.order_status != 'processing':
+        order.hold_expires_at = None
+    order.updated_at = datetime.now(timezone.utc)
+
+    try:
+        db.session.flush()
+    except StaleDataError:
+        raise ConcurrentUpdate()
@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from server.extensions import db
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row into an opaque cursor string"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    """Decode a cursor back into values typed for the given sort keys"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor('Invalid cursor')
+
+    typed = []
+    for (column, _), value in zip(keys, values):
+        if isinstance(column.type, db.DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (ValueError, TypeError):
+                raise InvalidCursor('Invalid cursor')
+        typed.append(value)
+    return typed
+
+
+def parse_limit(value, default, maximum):
+    """Parse the ?limit= parameter, clamped to [1, maximum]"""
+    try:
+        limit = int(value) if value is not None else default
+    except ValueError:
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def _after(keys, values):
+    """Build the WHERE clause selecting rows strictly after the cursor"""
+    directions = {descending for _, descending in keys}
+
+    # Uniform direction can use a row comparison, which Postgres matches
+    # directly against a composite index on the same columns
+    if len(directions) == 1:
+        columns = db.tuple_(*[column for column, _ in keys])
+        cursor = db.tuple_(*[db.literal(value, column.type) for (column, _), value in zip(keys, values)])
+        return columns < cursor if directions.pop() else columns > cursor
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        prefix = [keys[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(db.and_(*prefix, step))
+    return db.or_(*clauses)
+
+
+def keyset_paginate(query, keys, cursor=None, limit=20, key_values=None):
+    """Return (rows, next_cursor) for one page of query ordered by keys.
+
+    keys is a list of (column, descending) pairs that must end in a unique
+    column. The cost of a page is independent of how deep the client is,
+    unlike OFFSET which has to walk every skipped row.
+    """
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, keys)))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if key_values is None:
+            values = [getattr(last, column.key) for column, _ in keys]
+        else:
+            values = key_values(last)
+        next_cursor = encode_cursor(values)
+
+    return rows, next_cursor
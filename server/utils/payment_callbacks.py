@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta, timezone
+from server.extensions import db
+from server.models import Notification, Payment, PaymentCallback
+from server.utils.order_states import apply_transition, can_transition, ConcurrentUpdate
+
+# Callbacks are retried with a doubling delay (5s, 10s, 20s, 40s) and given up
+# on after MAX_ATTEMPTS tries - both for order version conflicts and for
+# callbacks that beat process_payment's commit of the payment they refer to
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=5)
+
+
+def _retry_at(callback, now):
+    return now + RETRY_DELAY * 2 ** max(0, callback.attempts - 1)
+
+
+def enqueue_callback(provider, payload):
+    """Store a provider callback for the workers - a single INSERT, nothing else"""
+    db.session.execute(db.insert(PaymentCallback).values(
+        provider=provider,
+        payload=payload,
+        status='pending',
+        attempts=0,
+        received_at=datetime.now(timezone.utc)
+    ))
+    db.session.commit()
+
+
+def parse_callback(provider, payload):
+    """Pull (provider_ref, success, amount, description, receipt) out of a provider payload, or None.
+
+    receipt is the provider's transaction id for money that actually moved -
+    the M-Pesa receipt number that settlement statements list.
+    """
+    if not isinstance(payload, dict):
+        return None
+
+    if provider == 'mpesa':
+        # Daraja STK push result: Body.stkCallback, ResultCode 0 is success
+        callback = (payload.get('Body') or {}).get('stkCallback')
+        if not callback or not callback.get('CheckoutRequestID'):
+            return None
+        items = (callback.get('CallbackMetadata') or {}).get('Item') or []
+        metadata = {item.get('Name'): item.get('Value') for item in items}
+        return (callback['CheckoutRequestID'], str(callback.get('ResultCode')) == '0',
+                metadata.get('Amount'), callback.get('ResultDesc'), metadata.get('MpesaReceiptNumber'))
+
+    # Generic providers post {provider_ref, status, amount, receipt}
+    if not payload.get('provider_ref'):
+        return None
+    return (payload['provider_ref'], payload.get('status') in ('success', 'successful', 'completed'),
+            payload.get('amount'), payload.get('description'), payload.get('receipt'))
+
+
+def _apply(callback, payment):
+    """Apply one callback to its payment and order. Returns (status, error)"""
+    parsed = parse_callback(callback.provider, callback.payload)
+    if parsed is None:
+        return 'failed', 'Unrecognised callback payload'
+    _, success, amount, description, receipt = parsed
+
+    if payment is None:
+        if callback.attempts < MAX_ATTEMPTS:
+            return 'pending', 'No payment with this reference yet'
+        return 'unmatched', 'No payment with this reference'
+    if payment.status != 'pending':
+        return 'processed', f'Duplicate callback, payment already {payment.status}'
+
+    # Kept whatever happens below - the money moved, reconciliation matches on it
+    if receipt:
+        payment.provider_receipt = str(receipt)
+
+    order = payment.order
+    if not success:
+        payment.status = 'failed'
+        if can_transition(order, 'fail_payment'):
+            apply_transition(order, 'fail_payment')
+        return 'processed', description
+
+    if amount is not None and abs(float(amount) - float(payment.amount)) > 0.01:
+        payment.status = 'failed'
+        return 'failed', f'Paid amount {amount} does not match payment amount {payment.amount}'
+
+    if not can_transition(order, 'pay'):
+        # Money arrived for an order that was cancelled or expired meanwhile - left for reconciliation
+        return 'failed', f'Order is {order.order_status} with payment {order.payment_status}'
+
+    payment.status = 'success'
+    apply_transition(order, 'pay')
+    db.session.add(Notification(
+        user_id=order.user_id,
+        title='Payment Successful!',
+        message=f'Your payment of KES {payment.amount} for order {order.reference} was successful.',
+        type='payment_success'
+    ))
+    return 'processed', None
+
+
+def process_callback_batch(batch_size):
+    """Claim up to batch_size pending callbacks and apply them. Returns how many this worker applied.
+
+    The batch is claimed with FOR UPDATE SKIP LOCKED, so any number of
+    workers can run side by side without waiting on each other. Each
+    callback is applied in its own savepoint: one that hits an order
+    version conflict, or whose payment is not there yet, is put back with a
+    next_attempt_at (see _retry_at) without losing the rest.
+    """
+    now = datetime.now(timezone.utc)
+    callbacks = db.session.scalars(
+        db.select(PaymentCallback)
+        .where(PaymentCallback.status == 'pending',
+               # Callbacks waiting to be retried stay out of the way until they are due
+               db.or_(PaymentCallback.next_attempt_at.is_(None), PaymentCallback.next_attempt_at <= now))
+        .order_by(PaymentCallback.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not callbacks:
+        db.session.rollback()
+        return 0
+
+    # Match the whole batch to its payments (and their orders) in one query
+    refs = {}
+    for callback in callbacks:
+        parsed = parse_callback(callback.provider, callback.payload)
+        if parsed:
+            refs[callback.id] = (callback.provider, parsed[0])
+    payments = {}
+    if refs:
+        rows = Payment.query.options(db.joinedload(Payment.order)) \
+            .filter(Payment.provider_ref.in_({ref for _, ref in refs.values()})).all()
+        payments = {(payment.provider, payment.provider_ref): payment for payment in rows}
+
+    owned = 0
+    for callback in callbacks:
+        try:
+            with db.session.begin_nested():
+                # Where SKIP LOCKED is unavailable (SQLite) workers can pick up
+                # the same batch - whoever flips the status first owns the callback
+                claimed = db.session.execute(
+                    db.update(PaymentCallback)
+                    .where(PaymentCallback.id == callback.id, PaymentCallback.status == 'pending')
+                    .values(status='processing')
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not claimed:
+                    db.session.expire(callback)
+                    continue
+                # The loaded status is stale now - make sure a retry writes 'pending' back
+                db.session.expire(callback, ['status'])
+                callback.attempts += 1
+                status, error = _apply(callback, payments.get(refs.get(callback.id)))
+                callback.status = status
+                callback.error = error
+                if status == 'pending':
+                    callback.next_attempt_at = _retry_at(callback, now)
+                else:
+                    owned += 1
+                    callback.processed_at = now
+        except ConcurrentUpdate:
+            # Savepoint rolled back - the callback is pending again for a later pass
+            db.session.expire(callback)
+            callback.attempts += 1
+            if callback.attempts >= MAX_ATTEMPTS:
+                callback.status = 'failed'
+                callback.error = 'Order kept changing while applying the callback'
+            else:
+                callback.next_attempt_at = _retry_at(callback, now)
+
+    db.session.commit()
+    return owned
+
+
+def process_callbacks(batch_size):
+    """Drain the callback inbox batch by batch. Returns the total processed"""
+    total = 0
+    while True:
+        count = process_callback_batch(batch_size)
+        total += count
+        if count < batch_size:
+            return total
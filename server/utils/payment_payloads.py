@@ -0,0 +1,37 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from server.extensions import db
+from server.models import PaymentPayload
+
+
+def compress_payload(payload):
+    return zlib.compress(json.dumps(payload, separators=(',', ':'), default=str).encode())
+
+
+def decompress_payload(data):
+    return json.loads(zlib.decompress(data))
+
+
+def store_payload(payment_id, payload, source='request'):
+    """Append a raw payload for a payment. Payload rows are never updated or deleted"""
+    db.session.execute(db.insert(PaymentPayload).values(
+        payment_id=payment_id,
+        source=source,
+        data=compress_payload(payload),
+        created_at=datetime.now(timezone.utc)
+    ))
+
+
+def payment_payloads(payment_id):
+    """Every payload stored for a payment, oldest first, decompressed"""
+    rows = db.session.execute(
+        db.select(PaymentPayload.source, PaymentPayload.data, PaymentPayload.created_at)
+        .where(PaymentPayload.payment_id == payment_id)
+        .order_by(PaymentPayload.id)
+    ).all()
+    return [{
+        'source': row.source,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'payload': decompress_payload(row.data)
+    } for row in rows]
@@ -0,0 +1,104 @@
+import base64
+import hashlib
+import zlib
+from xml.sax.saxutils import escape
+
+POSTER_PATH = '/api/events/{event_id}/poster.svg'
+
+
+def generate_event_background(title, category):
+    """Generate a cool gradient background SVG based on event title and category.
+    
+    The output only depends on the inputs, so the same event always renders the
+    same bytes and can be served from a content-addressed URL.
+    """
+    
+    # Define color palettes for different categories
+    category_colors = {
+        'Music': [('#667eea', '#764ba2'), ('#f093fb', '#f5576c')],
+        'Conference': [('#4facfe', '#00f2fe'), ('#667eea', '#764ba2')],
+        'Workshop': [('#43e97b', '#38f9d7'), ('#fa709a', '#fee140')],
+        'Sports': [('#fa709a', '#fee140'), ('#f093fb', '#f5576c')],
+        'Networking': [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe')],
+        'Art': [('#f093fb', '#f5576c'), ('#fa709a', '#fee140')],
+        'Food': [('#fa709a', '#fee140'), ('#43e97b', '#38f9d7')],
+        'Technology': [('#4facfe', '#00f2fe'), ('#667eea', '#764ba2')],
+        'Business': [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe')],
+        'Education': [('#43e97b', '#38f9d7'), ('#4facfe', '#00f2fe')]
+    }
+    
+    # Get colors for category or use default
+    if category in category_colors:
+        colors = category_colors[category]
+    else:
+        colors = [('#667eea', '#764ba2'), ('#4facfe', '#00f2fe'), 
+                  ('#43e97b', '#38f9d7'), ('#fa709a', '#fee140')]
+    
+    # Pick a color based on title hash (crc32 - hash() is salted per process)
+    title_hash = zlib.crc32(title.encode('utf-8')) if title else 0
+    color_index = title_hash % len(colors)
+    gradient_colors = colors[color_index]
+    
+    # Create an SVG gradient background
+    svg = f'''
+    <svg xmlns="http://www.w3.org/2000/svg" width="800" height="600" viewBox="0 0 800 600">
+        <defs>
+            <linearGradient id="grad" x1="0%" y1="0%" x2="100%" y2="100%">
+                <stop offset="0%" stop-color="{gradient_colors[0]}" />
+                <stop offset="100%" stop-color="{gradient_colors[1]}" />
+            </linearGradient>
+        </defs>
+        
+        <rect width="100%" height="100%" fill="url(#grad)"/>
+        
+        <!-- Decorative circles -->
+        <circle cx="100" cy="100" r="60" fill="white" opacity="0.1"/>
+        <circle cx="700" cy="500" r="80" fill="white" opacity="0.1"/>
+        <circle cx="600" cy="100" r="40" fill="white" opacity="0.1"/>
+        
+        <!-- Event title -->
+        <text x="400" y="300" 
+              font-family="Arial, sans-serif" 
+              font-size="48" 
+              font-weight="bold"
+              fill="white" 
+              text-anchor="middle" 
+              dominant-baseline="middle">
+            {escape(title or '')}
+        </text>
+        
+        <!-- Category badge -->
+        <rect x="350" y="350" width="100" height="30" rx="15" fill="white" opacity="0.2"/>
+        <text x="400" y="365" 
+              font-family="Arial, sans-serif" 
+              font-size="14" 
+              fill="white" 
+              text-anchor="middle" 
+              dominant-baseline="middle">
+            {escape(category or '')}
+        </text>
+    </svg>
+    '''
+    
+    return svg
+
+
+def poster_digest(svg):
+    return hashlib.sha256(svg.encode('utf-8')).hexdigest()[:16]
+
+
+def generated_poster_url(event_id, title, category):
+    """Short, content-addressed URL for an event's generated poster"""
+    svg = generate_event_background(title, category)
+    return f"{POSTER_PATH.format(event_id=event_id)}?v={poster_digest(svg)}"
+
+
+def is_generated_poster(poster_url, event_id):
+    # Clients may echo back the expanded absolute URL, so match on the path
+    return bool(poster_url) and POSTER_PATH.format(event_id=event_id) in poster_url
+
+
+def poster_data_url(title, category):
+    """Inline data URL form - what poster_url used to hold before posters were served separately"""
+    svg = generate_event_background(title, category).encode('utf-8')
+    return f"data:image/svg+xml;base64,{base64.b64encode(svg).decode('utf-8')}"
@@ -0,0 +1,59 @@
+from server.extensions import db
+from server.models import UserTicketPurchase
+
+
+def record_purchase(user_id, ticket_type_id, quantity, limit=None):
+    """Add quantity to the user's ledger row unless that would take it past limit.
+
+    One upsert on the (user_id, ticket_type_id) primary key; the limit is
+    checked inside the statement, so concurrent checkouts by the same user
+    cannot both slip under it. Returns False if the limit would be exceeded.
+    """
+    if limit is not None and quantity > limit:
+        return False
+
+    dialect = db.session.get_bind().dialect.name
+    new_total = UserTicketPurchase.quantity + quantity
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(UserTicketPurchase).values(user_id=user_id, ticket_type_id=ticket_type_id, quantity=quantity)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserTicketPurchase.user_id, UserTicketPurchase.ticket_type_id],
+            set_={'quantity': new_total},
+            where=(new_total <= limit) if limit is not None else None
+        )
+        return db.session.execute(stmt).rowcount == 1
+
+    query = db.update(UserTicketPurchase).where(UserTicketPurchase.user_id == user_id,
+                                                UserTicketPurchase.ticket_type_id == ticket_type_id)
+    if limit is not None:
+        query = query.where(new_total <= limit)
+    if db.session.execute(query.values(quantity=new_total)).rowcount:
+        return True
+    if db.session.get(UserTicketPurchase, (user_id, ticket_type_id)) is not None:
+        return False
+    db.session.add(UserTicketPurchase(user_id=user_id, ticket_type_id=ticket_type_id, quantity=quantity))
+    return True
+
+
+def release_purchases(rows):
+    """Take quantities off users' ledgers - rows of {'user_id', 'ticket_type_id', 'quantity'}.
+
+    Sent as a single executemany, however many orders are being released.
+    """
+    if not rows:
+        return
+    # Core table rather than the mapped class, so this stays a plain executemany
+    # instead of an ORM bulk update by primary key
+    ledger = UserTicketPurchase.__table__
+    remaining = ledger.c.quantity - db.bindparam('released')
+    db.session.execute(
+        db.update(ledger)
+        .where(ledger.c.user_id == db.bindparam('u_id'), ledger.c.ticket_type_id == db.bindparam('tt_id'))
+        .values(quantity=db.case((remaining > 0, remaining), else_=0)),
+        [{'u_id': row['user_id'], 'tt_id': row['ticket_type_id'], 'released': row['quantity']} for row in rows]
+    )
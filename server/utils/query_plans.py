@@ -0,0 +1,71 @@
+from server.extensions import db
+from server.models import (Event, TicketType, Order, OrderItem, Payment, Ticket,
+                           EventRegistration, Review, Wishlist, Notification, User)
+
+
+def hot_queries():
+    """The queries the routes run on every request, in the shape the routes build them"""
+    return {
+        'catalog listing': Event.query.filter(Event.status == 'approved', Event.start_time > db.func.now())
+            .order_by(Event.start_time, Event.id).limit(20),
+        'catalog by category': Event.query.filter(Event.status == 'approved', Event.category == 'Music',
+                                                  Event.start_time > db.func.now())
+            .order_by(Event.start_time, Event.id).limit(20),
+        'catalog by city': Event.query.filter(Event.status == 'approved', Event.city == 'Nairobi',
+                                              Event.start_time > db.func.now())
+            .order_by(Event.start_time, Event.id).limit(20),
+        'pending events': Event.query.filter(Event.status == 'pending'),
+        'organizer events': Event.query.filter(Event.organizer_id == 1),
+        'event ticket types': TicketType.query.filter(TicketType.event_id == 1, TicketType.is_active == True),
+        'event reviews': Review.query.filter(Review.event_id == 1).order_by(Review.created_at.desc()).limit(20),
+        'event orders': Order.query.filter(Order.event_id == 1),
+        'event registrations': EventRegistration.query.filter(EventRegistration.event_id == 1),
+        'event wishlists': Wishlist.query.filter(Wishlist.event_id == 1),
+        'user orders': Order.query.filter(Order.user_id == 1).order_by(Order.created_at.desc()).limit(20),
+        'admin orders': Order.query.order_by(Order.created_at.desc()).limit(100),
+        'order items': OrderItem.query.filter(OrderItem.order_id == 1),
+        'order tickets': Ticket.query.filter(Ticket.order_id == 1),
+        'order payments': Payment.query.filter(Payment.order_id == 1),
+        'payment by provider ref': Payment.query.filter(Payment.provider_ref == 'REF'),
+        'user notifications': Notification.query.filter(Notification.user_id == 1)
+            .order_by(Notification.created_at.desc()),
+        'users by role': User.query.filter(User.role_id == 1),
+    }
+
+
+def _postgres_seq_scans(plan):
+    found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        found.extend(_postgres_seq_scans(child))
+    return found
+
+
+def explain(query):
+    """Return (plan_text, tables scanned sequentially) for a query"""
+    bind = db.session.get_bind()
+    sql = str(query.statement.compile(dialect=bind.dialect, compile_kwargs={'literal_binds': True}))
+
+    if bind.dialect.name == 'postgresql':
+        # Tiny development tables are always cheaper to seq scan; disabling it
+        # shows whether an index path exists at all.
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+        plan = db.session.execute(db.text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()[0]['Plan']
+        return plan, _postgres_seq_scans(plan)
+
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    details = [row[-1] for row in rows]
+    seq_scans = [d.split()[1] for d in details if d.startswith('SCAN ') and ' USING ' not in d]
+    return '\n'.join(details), seq_scans
+
+
+def check_hot_queries():
+    """EXPLAIN every hot query. Returns {name: (plan, seq_scanned_tables)}"""
+    results = {}
+    try:
+        for name, query in hot_queries().items():
+            results[name] = explain(query)
+    finally:
+        db.session.rollback()
+    return results
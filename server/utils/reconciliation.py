@@ -0,0 +1,138 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from server.extensions import db
+from server.models import Payment
+
+# Header names recognised for the receipt number and amount columns, lower-cased.
+# M-Pesa org statements use "Receipt No." and "Paid In".
+REF_COLUMNS = ('provider_receipt', 'receipt no.', 'receipt no', 'receipt', 'transaction id')
+AMOUNT_COLUMNS = ('amount', 'paid in', 'paid_in')
+
+CATEGORIES = ('missing_in_db', 'missing_in_statement', 'amount_mismatches',
+              'duplicates_in_statement', 'duplicates_in_db', 'no_receipt')
+
+
+def _cents(value):
+    try:
+        return int((Decimal(str(value).replace(',', '').strip()) * 100).to_integral_value())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _column_index(header, wanted, candidates):
+    names = [wanted.strip().lower()] if wanted else candidates
+    for name in names:
+        if name in header:
+            return header.index(name)
+    raise ValueError(f"Statement has no {' / '.join(names)} column")
+
+
+def read_statement(lines, ref_column=None, amount_column=None):
+    """Stream a CSV statement into ({ref: amount in cents}, duplicate refs, line count, unreadable lines).
+
+    lines is any iterable of text lines (an open file, a wrapped upload
+    stream), read once, front to back.
+    """
+    reader = csv.reader(lines)
+    header = [name.strip().lower() for name in next(reader, [])]
+    ref_index = _column_index(header, ref_column, REF_COLUMNS)
+    amount_index = _column_index(header, amount_column, AMOUNT_COLUMNS)
+    width = max(ref_index, amount_index) + 1
+
+    amounts = {}
+    duplicates = set()
+    line_count = unreadable = 0
+    for row in reader:
+        if not row:
+            continue
+        line_count += 1
+        if len(row) < width:
+            unreadable += 1
+            continue
+        ref = row[ref_index].strip()
+        amount = _cents(row[amount_index])
+        if not ref or amount is None:
+            unreadable += 1
+            continue
+        if ref in amounts:
+            duplicates.add(ref)
+        amounts[ref] = amount
+
+    return amounts, duplicates, line_count, unreadable
+
+
+def reconcile(statement, provider='mpesa', start=None, end=None, batch_size=5000):
+    """Compare a statement from read_statement() with the payments table.
+
+    Statement lines are matched on Payment.provider_receipt - the receipt
+    number the provider's callback reported - not on provider_ref, which
+    holds the request id of the push. The payments are streamed once in
+    yield_per batches and everything else is dict lookups and set algebra -
+    no query per statement line. start/end limit which payments must appear
+    on the statement (the period it covers). Returns full, sorted
+    discrepancy lists per category; no_receipt lists successful payments
+    whose callback carried no receipt to match on (by provider_ref).
+    """
+    amounts, statement_duplicates, line_count, unreadable = statement
+
+    in_period = db.true()
+    if start:
+        in_period = db.and_(in_period, Payment.created_at >= start)
+    if end:
+        in_period = db.and_(in_period, Payment.created_at < end)
+
+    query = db.select(
+        Payment.provider_receipt,
+        Payment.id,
+        Payment.provider_ref,
+        Payment.amount,
+        db.case((in_period, True), else_=False).label('in_period')
+    ).where(Payment.provider == provider,
+            db.or_(Payment.provider_receipt.isnot(None), Payment.status == 'success'))
+
+    db_refs = set()
+    db_duplicates = set()
+    expected_refs = set()
+    no_receipt = []
+    mismatches = []
+    checked = 0
+    for partition in db.session.execute(query.execution_options(yield_per=batch_size)).partitions():
+        for ref, payment_id, provider_ref, amount, period in partition:
+            checked += 1
+            if ref is None:
+                if period:
+                    no_receipt.append(provider_ref or f'payment:{payment_id}')
+                continue
+            if ref in db_refs:
+                db_duplicates.add(ref)
+                continue
+            db_refs.add(ref)
+
+            # A receipt means money moved, whatever became of the payment afterwards
+            if period:
+                expected_refs.add(ref)
+            paid = amounts.get(ref)
+            if paid is not None and paid != _cents(amount):
+                mismatches.append({'ref': ref, 'statement_amount': paid / 100, 'payment_amount': float(amount)})
+
+    statement_refs = amounts.keys()
+    return {
+        'statement_lines': line_count,
+        'unreadable_lines': unreadable,
+        'payments_checked': checked,
+        'matched': len(statement_refs & db_refs),
+        'missing_in_db': sorted(statement_refs - db_refs),
+        'missing_in_statement': sorted(expected_refs - statement_refs),
+        'amount_mismatches': sorted(mismatches, key=lambda item: item['ref']),
+        'duplicates_in_statement': sorted(statement_duplicates),
+        'duplicates_in_db': sorted(db_duplicates),
+        'no_receipt': sorted(no_receipt),
+    }
+
+
+def summarize(result, sample_size=100):
+    """Counts plus the first sample_size entries of each discrepancy list"""
+    summary = {key: value for key, value in result.items() if key not in CATEGORIES}
+    for category in CATEGORIES:
+        summary[category] = {'count': len(result[category]), 'sample': result[category][:sample_size]}
+    return summary
@@ -0,0 +1,80 @@
+import re
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from server.extensions import db
+from server.models import Event
+
+# Column weights - title matches must outrank description matches.
+# Postgres maps A/B/C/D onto ts_rank's default weights {1.0, 0.4, 0.2, 0.1}.
+SQLITE_BM25_WEIGHTS = (10.0, 4.0, 4.0, 1.0)  # title, category, venue, description
+
+_fts = db.table('events_fts', db.column('rowid'))
+
+
+def _terms(search):
+    return re.findall(r'\w+', search.lower())
+
+
+def dialect_name():
+    return db.session.get_bind().dialect.name
+
+
+def apply_search(query, search):
+    """Filter an Event query by full-text search.
+
+    Returns (query, rank) where rank is a higher-is-better expression added to
+    the query as the 'search_rank' column, or (query, None) if the search
+    string contains no searchable terms. Every term is prefix matched.
+    """
+    terms = _terms(search)
+    if not terms:
+        return query, None
+
+    dialect = dialect_name()
+
+    if dialect == 'postgresql':
+        vector = db.literal_column('events.search_vector')
+        tsquery = db.func.to_tsquery('english', ' & '.join(f'{term}:*' for term in terms))
+        # ts_rank is a float4 - widen it so the keyset cursor round-trips exactly
+        rank = db.cast(db.func.ts_rank(vector, tsquery), DOUBLE_PRECISION)
+        query = query.filter(vector.op('@@')(tsquery))
+
+    elif dialect == 'sqlite':
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        rank = -db.func.bm25(db.literal_column('events_fts'), *SQLITE_BM25_WEIGHTS, type_=db.Float)
+        query = query.join(_fts, _fts.c.rowid == Event.id).filter(
+            db.text('events_fts MATCH :search_match').bindparams(search_match=match)
+        )
+
+    else:
+        # No full-text backend for this database - fall back to substring matching
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(db.or_(
+                Event.title.ilike(pattern),
+                Event.description.ilike(pattern),
+                Event.venue.ilike(pattern),
+                Event.category.ilike(pattern)
+            ))
+        rank = db.case((Event.title.ilike(f'%{terms[0]}%'), 1.0), else_=0.0)
+
+    return query.add_columns(rank.label('search_rank')), rank
+
+
+def rebuild_search_index():
+    """Repopulate the full-text index for the current database.
+
+    The index itself (search_vector on Postgres, events_fts and its triggers
+    on SQLite) is created by migration 3f9c2d7a1b64.
+    """
+    dialect = dialect_name()
+
+    if dialect == 'postgresql':
+        # search_vector is a generated column, Postgres keeps it current itself
+        db.session.execute(db.text('REINDEX INDEX ix_events_search_vector'))
+    elif dialect == 'sqlite':
+        if not db.inspect(db.session.connection()).has_table('events_fts'):
+            raise RuntimeError('events_fts is missing - run `flask db upgrade` first')
+        db.session.execute(db.text("INSERT INTO events_fts(events_fts) VALUES ('rebuild')"))
+
+    db.session.commit()
+    return dialect
@@ -0,0 +1,45 @@
+import secrets
+from datetime import datetime, timezone
+from server.extensions import db
+from server.models import Ticket
+
+TICKET_CODE_PREFIX = 'TKT-'
+TICKET_CODE_HEX_LENGTH = 12
+
+
+def generate_ticket_codes(count):
+    """count random ticket codes, in the same TKT-XXXXXXXXXXXX form as the model default.
+
+    Draws all the randomness in one call instead of one uuid4() per ticket.
+    """
+    raw = secrets.token_hex(count * TICKET_CODE_HEX_LENGTH // 2).upper()
+    return [TICKET_CODE_PREFIX + raw[i:i + TICKET_CODE_HEX_LENGTH]
+            for i in range(0, len(raw), TICKET_CODE_HEX_LENGTH)]
+
+
+def issue_tickets(order_id, quantities):
+    """Insert the tickets for an order in one multi-row INSERT.
+
+    quantities is a list of (ticket_type_id, quantity). Returns the new
+    tickets as {'code', 'ticket_type_id'} dicts in the same order - the
+    codes are generated here, so nothing has to be read back. Rows go in
+    through Core, so the session's Order.tickets collection is not updated.
+    """
+    codes = generate_ticket_codes(sum(quantity for _, quantity in quantities))
+    created_at = datetime.now(timezone.utc)
+
+    rows = []
+    for ticket_type_id, quantity in quantities:
+        for _ in range(quantity):
+            rows.append({
+                'order_id': order_id,
+                'ticket_type_id': ticket_type_id,
+                'code': codes[len(rows)],
+                'status': 'valid',
+                'created_at': created_at
+            })
+
+    if rows:
+        # executemany on an INSERT is sent as batched multi-row VALUES statements
+        db.session.execute(db.insert(Ticket), rows)
+    return [{'code': row['code'], 'ticket_type_id': row['ticket_type_id']} for row in rows]
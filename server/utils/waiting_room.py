@@ -0,0 +1,157 @@
+import time
+import jwt
+from .cache import LocalBackend, RedisBackend
+
+
+class WaitingRoom:
+    """Per-event admission queue for high-demand on-sales.
+
+    Joining hands out a signed queue ticket carrying the buyer's place in
+    line. The head of the line advances by admit_rate places per second and
+    buyers at or behind it get a purchase token, valid for purchase_window
+    seconds, that create_order requires for high-demand events. All state
+    lives in the shared backend (Redis when CACHE_REDIS_URL is set) and the
+    tickets are self-describing, so polling never touches the database.
+    """
+
+    # Seconds of admissions the head may catch up on after a quiet spell
+    MAX_CATCHUP = 5
+
+    def __init__(self, app=None):
+        self.backend = LocalBackend()
+        self.admit_rate = 10
+        self.purchase_window = 300
+        self.queue_ttl = 6 * 60 * 60
+        self.secret = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.admit_rate = app.config.get('WAITING_ROOM_ADMIT_RATE', 10)
+        self.purchase_window = app.config.get('WAITING_ROOM_PURCHASE_WINDOW', 300)
+        self.queue_ttl = app.config.get('WAITING_ROOM_QUEUE_TTL', 6 * 60 * 60)
+        self.secret = app.config['JWT_SECRET_KEY']
+        redis_url = app.config.get('CACHE_REDIS_URL')
+        self.backend = RedisBackend(redis_url) if redis_url else LocalBackend()
+        app.extensions['waiting_room'] = self
+
+    def _key(self, event_id, name):
+        return f'waitroom:{event_id}:{name}'
+
+    def _advance(self, event_id):
+        """Move the head of the line forward for the seconds elapsed since it last moved.
+
+        Only the first caller in any given second wins the tick, so the head
+        moves once per second however many buyers are polling.
+        """
+        now = int(time.time())
+        if not self.backend.add(self._key(event_id, f'tick:{now}'), 1, ttl=self.MAX_CATCHUP):
+            return
+        last = int(self.backend.get(self._key(event_id, 'last')) or now - 1)
+        self.backend.set(self._key(event_id, 'last'), now, ttl=self.queue_ttl)
+
+        steps = max(1, min(now - last, self.MAX_CATCHUP))
+        head = self.backend.incr(self._key(event_id, 'head'), self.admit_rate * steps)
+        tail = int(self.backend.get(self._key(event_id, 'tail')) or 0)
+        if head > tail:
+            # Don't bank admissions while nobody is waiting
+            self.backend.set(self._key(event_id, 'head'), tail, ttl=self.queue_ttl)
+
+    def _spent(self, event_id, number):
+        """Whether a place in line is used up - its purchase token was claimed or its window lapsed"""
+        if self.backend.get(self._key(event_id, f'used:{number}')):
+            return True
+        admitted_at = self.backend.get(self._key(event_id, f'admitted:{number}'))
+        return admitted_at is not None and int(admitted_at) + self.purchase_window <= time.time()
+
+    def join(self, event_id, user_id):
+        """Put a buyer in line. Returns their status.
+
+        Joining again keeps the buyer's place, unless that place is spent
+        (see _spent) - then they go to the back of the line with a new number.
+        """
+        user_key = self._key(event_id, f'user:{user_id}')
+        number = self.backend.get(user_key)
+        if number is None or self._spent(event_id, int(number)):
+            number = self.backend.incr(self._key(event_id, 'tail'))
+            self.backend.set(user_key, number, ttl=self.queue_ttl)
+
+        ticket = jwt.encode({
+            'purpose': 'queue',
+            'event_id': event_id,
+            'user_id': user_id,
+            'number': int(number),
+            'exp': int(time.time()) + self.queue_ttl
+        }, self.secret)
+        return {'ticket': ticket, **self._status(event_id, user_id, int(number))}
+
+    def status(self, event_id, ticket):
+        """Status for a queue ticket, or None if the ticket is invalid for this event"""
+        try:
+            data = jwt.decode(ticket, self.secret, algorithms=['HS256'])
+        except jwt.InvalidTokenError:
+            return None
+        if data.get('purpose') != 'queue' or data.get('event_id') != event_id:
+            return None
+        return self._status(event_id, data['user_id'], data['number'])
+
+    def _status(self, event_id, user_id, number):
+        self._advance(event_id)
+        head = int(self.backend.get(self._key(event_id, 'head')) or 0)
+
+        if number > head:
+            position = number - head
+            return {
+                'status': 'waiting',
+                'position': position,
+                'estimated_wait_seconds': -(-position // self.admit_rate),
+                'retry_after': 5 if position > self.admit_rate * 5 else 2
+            }
+
+        # The purchase window starts the first time the buyer is seen at the front
+        now = int(time.time())
+        admitted_key = self._key(event_id, f'admitted:{number}')
+        if self.backend.add(admitted_key, now, ttl=self.queue_ttl):
+            admitted_at = now
+        else:
+            admitted_at = int(self.backend.get(admitted_key) or now)
+
+        expires_at = admitted_at + self.purchase_window
+        if expires_at <= now:
+            return {'status': 'expired', 'position': 0}
+
+        token = jwt.encode({
+            'purpose': 'purchase',
+            'event_id': event_id,
+            'user_id': user_id,
+            'number': number,
+            'exp': expires_at
+        }, self.secret)
+        return {'status': 'admitted', 'position': 0, 'purchase_token': token, 'purchase_expires_at': expires_at}
+
+    def claim(self, token, event_id, user_id):
+        """Claim a purchase token for one order.
+
+        Returns (claim, None) on success - pass claim to release() if the
+        order then fails - or (None, error message).
+        """
+        if not token:
+            return None, 'This event is in high demand - join the waiting room to buy tickets'
+        try:
+            data = jwt.decode(token, self.secret, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            return None, 'Your purchase window has expired - rejoin the waiting room'
+        except jwt.InvalidTokenError:
+            return None, 'Invalid purchase token'
+        if data.get('purpose') != 'purchase' or data.get('event_id') != event_id or data.get('user_id') != user_id:
+            return None, 'Invalid purchase token'
+
+        claim = self._key(event_id, f'used:{data["number"]}')
+        if not self.backend.add(claim, 1, ttl=self.purchase_window):
+            return None, 'This purchase token has already been used'
+        return claim, None
+
+    def release(self, claim):
+        """Make a claimed purchase token usable again after its order failed"""
+        if claim:
+            self.backend.delete(claim)